@@ -4,11 +4,9 @@ import platform
 import math
 import textwrap
 
-# Initialize pygame
-pygame.init()
+# pygame starts in open_window(), when the first frame is drawn
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Stickman Fighting Game")
+screen = None
 FPS = 60
 clock = pygame.time.Clock()
 
@@ -225,7 +223,18 @@ player2 = Player(600, HEIGHT - 60, BLUE, {
 def setup():
     pass
 
+def open_window():
+    # Only the display and fonts, pygame.init() would start audio and joysticks too
+    global screen
+    if screen is None:
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Stickman Fighting Game")
+    return screen
+
 async def update_loop():
+    open_window()
     running = True
     while running:
         for event in pygame.event.get():
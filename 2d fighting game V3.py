@@ -1,17 +1,28 @@
 import pygame
+import argparse
 import asyncio
+import os
 import platform
-import math
-import textwrap
-import random
-
-# Initialize pygame
-pygame.init()
-WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Stickman Fighting Game")
-FPS = 60
-clock = pygame.time.Clock()
+import time
+
+from stickman import display, netplay, sim, ui
+from stickman.brawl import Brawl
+from stickman.inputs import InputLayer
+from stickman.particles import ParticlePool
+from stickman.sim import ease_in_out_cubic
+from stickman.poses import pose_cache
+from stickman.profiler import NULL_PROFILER, FrameProfiler
+from stickman.render import DirtyRenderer
+from stickman.replay import ReplayReader, ReplayWriter
+from stickman.rewind import REWIND_SECONDS, RewindBuffer
+from stickman.scheduler import FrameScheduler, UNCAPPED, DISPLAY
+from stickman.search import DIFFICULTY, SearchWorker
+from stickman.telemetry import Telemetry
+
+# pygame starts in open_window(), when the first frame is drawn
+WIDTH, HEIGHT = sim.WIDTH, sim.HEIGHT
+screen = None
+FPS = sim.FPS
 
 # Colors
 WHITE = (255, 255, 255)
@@ -20,13 +31,7 @@ RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 GRAY = (100, 100, 100)
 
-# Easing function for animations
-def ease_in_out_cubic(t):
-    t *= 2
-    if t < 1:
-        return 0.5 * t ** 3
-    t -= 2
-    return 0.5 * (t ** 3 + 2)
+MENU_WIDTH, MENU_HEIGHT = 400, 300
 
 # Menu class
 class Menu:
@@ -40,8 +45,18 @@ class Menu:
         self.play_button = pygame.Rect(WIDTH // 2 - 50, HEIGHT // 2 - 50, 100, 50)
         self.settings_button = pygame.Rect(WIDTH // 2 - 50, HEIGHT // 2 + 20, 100, 50)
         self.fullscreen_button = pygame.Rect(WIDTH // 2 - 150, HEIGHT // 2 - 50, 200, 50)
-        self.borderless_button = pygame.Rect(WIDTH // 2 - 150, HEIGHT // 2 + 20, 200, 50)
+        self.windowed_button = pygame.Rect(WIDTH // 2 - 150, HEIGHT // 2 + 20, 200, 50)
         self.back_button = pygame.Rect(WIDTH // 2 - 50, HEIGHT // 2 + 90, 100, 50)
+        self.background = WHITE
+        self.update_notes = "added fullscreen support"
+        self.panels = {
+            "update": ui.Panel(MENU_WIDTH, MENU_HEIGHT, self.build_update_panel),
+            "main": ui.Panel(MENU_WIDTH, MENU_HEIGHT, self.build_main_panel),
+            "settings": ui.Panel(MENU_WIDTH, MENU_HEIGHT, self.build_settings_panel),
+        }
+        self.overlay = None
+        self.frame = None
+        self.frame_key = None
 
     def update(self):
         if self.update_active or self.main_active or self.settings_active:
@@ -51,65 +66,88 @@ class Menu:
             else:
                 self.scale = 1
 
+    def active_panel(self):
+        if self.update_active:
+            return "update"
+        if self.main_active:
+            return "main"
+        if self.settings_active:
+            return "settings"
+        return None
+
+    def draw_panel_frame(self, surface):
+        surface.fill((200, 200, 200))
+        pygame.draw.rect(surface, BLACK, (0, 0, MENU_WIDTH, MENU_HEIGHT), 2)
+
+    def build_update_panel(self, surface):
+        self.draw_panel_frame(surface)
+        title = ui.render_text("Stickman V3 Update", 40, BLACK)  # Updated to V3
+        note_surfaces = [ui.render_text(line, 28, BLACK) for line in ui.wrap_text(self.update_notes, 35)]
+        button_text = ui.render_text("OK", 28, WHITE)
+
+        surface.blit(title, (MENU_WIDTH // 2 - title.get_width() // 2, 30))
+        for i, note_surface in enumerate(note_surfaces):
+            surface.blit(note_surface, 
+                         (MENU_WIDTH // 2 - note_surface.get_width() // 2, 80 + i * 30))
+        pygame.draw.rect(surface, GRAY, (MENU_WIDTH // 2 - 50, MENU_HEIGHT - 100, 100, 50))
+        surface.blit(button_text, (MENU_WIDTH // 2 - button_text.get_width() // 2, MENU_HEIGHT - 85))
+
+    def build_main_panel(self, surface):
+        self.draw_panel_frame(surface)
+        title = ui.render_text("Stickman Fighting", 40, BLACK)
+        play_text = ui.render_text("Play", 28, WHITE)
+        settings_text = ui.render_text("Settings", 28, WHITE)
+
+        surface.blit(title, (MENU_WIDTH // 2 - title.get_width() // 2, 30))
+        pygame.draw.rect(surface, GRAY, (MENU_WIDTH // 2 - 50, MENU_HEIGHT // 2 - 50, 100, 50))
+        pygame.draw.rect(surface, GRAY, (MENU_WIDTH // 2 - 50, MENU_HEIGHT // 2 + 20, 100, 50))
+        surface.blit(play_text, (MENU_WIDTH // 2 - play_text.get_width() // 2, MENU_HEIGHT // 2 - 35))
+        surface.blit(settings_text, (MENU_WIDTH // 2 - settings_text.get_width() // 2, MENU_HEIGHT // 2 + 35))
+
+    def build_settings_panel(self, surface):
+        self.draw_panel_frame(surface)
+        title = ui.render_text("Settings", 40, BLACK)
+        fullscreen_text = ui.render_text("Fullscreen", 28, WHITE)
+        windowed_text = ui.render_text("Windowed", 28, WHITE)
+        back_text = ui.render_text("Back", 28, WHITE)
+
+        surface.blit(title, (MENU_WIDTH // 2 - title.get_width() // 2, 30))
+        pygame.draw.rect(surface, GRAY, (MENU_WIDTH // 2 - 150, MENU_HEIGHT // 2 - 50, 200, 50))
+        pygame.draw.rect(surface, GRAY, (MENU_WIDTH // 2 - 150, MENU_HEIGHT // 2 + 20, 200, 50))
+        pygame.draw.rect(surface, GRAY, (MENU_WIDTH // 2 - 50, MENU_HEIGHT // 2 + 90, 100, 50))
+        surface.blit(fullscreen_text, (MENU_WIDTH // 2 - fullscreen_text.get_width() // 2, MENU_HEIGHT // 2 - 35))
+        surface.blit(windowed_text, (MENU_WIDTH // 2 - windowed_text.get_width() // 2, MENU_HEIGHT // 2 + 35))
+        surface.blit(back_text, (MENU_WIDTH // 2 - back_text.get_width() // 2, MENU_HEIGHT // 2 + 105))
+
     def draw(self, screen):
-        # Draw semi-transparent overlay
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
+        name = self.active_panel()
+        if name is None:
+            return
+        panel = self.panels[name]
+
+        # Once the pop-up animation is done the whole menu screen is one cached surface
+        if self.scale >= 1:
+            key = (name, screen.get_size())
+            if self.frame is None or self.frame_key != key:
+                self.frame = pygame.Surface(screen.get_size())
+                self.draw_scaled(self.frame, panel)
+                self.frame_key = key
+            screen.blit(self.frame, (0, 0))
+            return
+        self.draw_scaled(screen, panel)
+
+    def draw_scaled(self, screen, panel):
+        # Draw background and semi-transparent overlay
+        screen.fill(self.background)
+        if self.overlay is None or self.overlay.get_size() != screen.get_size():
+            self.overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 150))
+        screen.blit(self.overlay, (0, 0))
 
         # Draw menu
-        menu_width, menu_height = 400, 300
-        scaled_width = int(menu_width * self.scale)
-        scaled_height = int(menu_height * self.scale)
-        menu_surface = pygame.Surface((menu_width, menu_height), pygame.SRCALPHA)
-        menu_surface.fill((200, 200, 200))
-        pygame.draw.rect(menu_surface, BLACK, (0, 0, menu_width, menu_height), 2)
-
-        font = pygame.font.Font(None, 40)
-        font_small = pygame.font.Font(None, 28)
-        
-        if self.update_active:
-            title = font.render("Stickman V3 Update", True, BLACK)  # Updated to V3
-            note_text = ""
-            note_text = "added fullscreen support"
-            wrapped_lines = textwrap.wrap(note_text, width=35)
-            note_surfaces = [font_small.render(line, True, BLACK) for line in wrapped_lines]
-            button_text = font_small.render("OK", True, WHITE)
-
-            menu_surface.blit(title, (menu_width // 2 - title.get_width() // 2, 30))
-            for i, note_surface in enumerate(note_surfaces):
-                menu_surface.blit(note_surface, 
-                                (menu_width // 2 - note_surface.get_width() // 2, 80 + i * 30))
-            pygame.draw.rect(menu_surface, GRAY, (menu_width // 2 - 50, menu_height - 100, 100, 50))
-            menu_surface.blit(button_text, (menu_width // 2 - button_text.get_width() // 2, menu_height - 85))
-        
-        elif self.main_active:
-            title = font.render("Stickman Fighting", True, BLACK)
-            play_text = font_small.render("Play", True, WHITE)
-            settings_text = font_small.render("Settings", True, WHITE)
-
-            menu_surface.blit(title, (menu_width // 2 - title.get_width() // 2, 30))
-            pygame.draw.rect(menu_surface, GRAY, (menu_width // 2 - 50, menu_height // 2 - 50, 100, 50))
-            pygame.draw.rect(menu_surface, GRAY, (menu_width // 2 - 50, menu_height // 2 + 20, 100, 50))
-            menu_surface.blit(play_text, (menu_width // 2 - play_text.get_width() // 2, menu_height // 2 - 35))
-            menu_surface.blit(settings_text, (menu_width // 2 - settings_text.get_width() // 2, menu_height // 2 + 35))
-        
-        elif self.settings_active:
-            title = font.render("Settings", True, BLACK)
-            fullscreen_text = font_small.render("Fullscreen", True, WHITE)
-            borderless_text = font_small.render("Fullscreen Borderless", True, WHITE)
-            back_text = font_small.render("Back", True, WHITE)
-
-            menu_surface.blit(title, (menu_width // 2 - title.get_width() // 2, 30))
-            pygame.draw.rect(menu_surface, GRAY, (menu_width // 2 - 150, menu_height // 2 - 50, 200, 50))
-            pygame.draw.rect(menu_surface, GRAY, (menu_width // 2 - 150, menu_height // 2 + 20, 200, 50))
-            pygame.draw.rect(menu_surface, GRAY, (menu_width // 2 - 50, menu_height // 2 + 90, 100, 50))
-            menu_surface.blit(fullscreen_text, (menu_width // 2 - fullscreen_text.get_width() // 2, menu_height // 2 - 35))
-            menu_surface.blit(borderless_text, (menu_width // 2 - borderless_text.get_width() // 2, menu_height // 2 + 35))
-            menu_surface.blit(back_text, (menu_width // 2 - back_text.get_width() // 2, menu_height // 2 + 105))
-
-        scaled_menu = pygame.transform.scale(menu_surface, (scaled_width, scaled_height))
-        screen.blit(scaled_menu, (WIDTH // 2 - scaled_width // 2, HEIGHT // 2 - scaled_height // 2))
+        scaled_menu = panel.render_scaled(self.scale)
+        screen.blit(scaled_menu, (WIDTH // 2 - scaled_menu.get_width() // 2,
+                                  HEIGHT // 2 - scaled_menu.get_height() // 2))
 
     def check_button_click(self, pos):
         if self.animation_frame < 20:
@@ -154,7 +192,7 @@ class Menu:
                 200 * self.scale,
                 50 * self.scale
             )
-            scaled_borderless = pygame.Rect(
+            scaled_windowed = pygame.Rect(
                 WIDTH // 2 - 150 * self.scale,
                 HEIGHT // 2 + 20 * self.scale,
                 200 * self.scale,
@@ -166,12 +204,13 @@ class Menu:
                 100 * self.scale,
                 50 * self.scale
             )
+            # Fullscreen is desktop fullscreen, which is borderless already
             if scaled_fullscreen.collidepoint(pos):
-                pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
+                set_fullscreen(True)
                 return True, "fullscreen"
-            if scaled_borderless.collidepoint(pos):
-                pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN | pygame.NOFRAME)
-                return True, "borderless"
+            if scaled_windowed.collidepoint(pos):
+                set_fullscreen(False)
+                return True, "windowed"
             if scaled_back.collidepoint(pos):
                 self.settings_active = False
                 self.main_active = True
@@ -180,235 +219,378 @@ class Menu:
         return False, None
 
 # Player class
-class Player:
-    def __init__(self, x, y, color, controls, is_ai=False):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.controls = controls
-        self.is_ai = is_ai
-        self.width = 20
-        self.height = 40
-        self.head_radius = 10
-        self.state = "idle"
-        self.animation_frame = 0
-        self.health = 100
-        self.facing = 1 if x < WIDTH // 2 else -1
-        self.hit_cooldown = 0
-        self.target_x = x
-        self.ai_action_timer = 0
-        self.ai_action_duration = random.randint(30, 60)
+class Player(sim.Player):
+    __slots__ = ()
 
-    def draw(self, screen):
-        pygame.draw.line(screen, self.color, (self.x, self.y), (self.x, self.y + self.height), 2)
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.head_radius)
-        pygame.draw.line(screen, self.color, (self.x, self.y + self.height), 
-                        (self.x - 10 * self.facing, self.y + self.height + 20), 2)
-        if self.state != "kicking":
-            pygame.draw.line(screen, self.color, (self.x, self.y + self.height), 
-                            (self.x + 10 * self.facing, self.y + self.height + 20), 2)
-        
-        if self.state == "punching":
-            t = self.animation_frame / 20
-            if t < 0.3:
-                t = ease_in_out_cubic(t / 0.3)
-                arm_end_x = self.x - 10 * self.facing * t
-                arm_end_y = self.y + 10 + 10 * t
-            else:
-                t = ease_in_out_cubic((t - 0.3) / 0.7)
-                arm_end_x = self.x + 25 * self.facing * (1 + 0.2 * t)
-                arm_end_y = self.y + 10
-            pygame.draw.line(screen, self.color, (self.x, self.y + 10), 
-                           (arm_end_x, arm_end_y), 2)
-            pygame.draw.line(screen, self.color, (self.x, self.y + 10), 
-                           (self.x - 10 * self.facing, self.y + 20), 2)
-        elif self.state == "kicking":
-            t = self.animation_frame / 20
-            if t < 0.3:
-                t = ease_in_out_cubic(t / 0.3)
-                leg_end_x = self.x - 10 * self.facing * t
-                leg_end_y = self.y + self.height + 10 * t
-            else:
-                t = ease_in_out_cubic((t - 0.3) / 0.7)
-                leg_end_x = self.x + 25 * self.facing * (1 + 0.2 * t)
-                leg_end_y = self.y + self.height + 15
-            pygame.draw.line(screen, self.color, (self.x, self.y + 10), 
-                           (self.x - 10 * self.facing, self.y + 20), 2)
-            pygame.draw.line(screen, self.color, (self.x, self.y + self.height), 
-                           (leg_end_x, leg_end_y), 2)
-        else:
-            pygame.draw.line(screen, self.color, (self.x, self.y + 10), 
-                           (self.x - 10 * self.facing, self.y + 20), 2)
-            pygame.draw.line(screen, self.color, (self.x, self.y + 10), 
-                           (self.x + 10 * self.facing, self.y + 20), 2)
-            pygame.draw.line(screen, self.color, (self.x, self.y + self.height), 
-                           (self.x + 10 * self.facing, self.y + self.height + 20), 2)
-
-    def move(self, keys):
-        if self.is_ai:
-            return
-        if self.state in ["punching", "kicking", "hit"]:
-            return
-        if keys[self.controls["left"]]:
-            self.x -= 5
-            self.target_x = self.x
-            self.facing = -1
-        if keys[self.controls["right"]]:
-            self.x += 5
-            self.target_x = self.x
-            self.facing = 1
-        self.x = max(self.head_radius, min(WIDTH - self.head_radius, self.x))
-        self.target_x = self.x
-
-    def ai_move(self, opponent):
-        if self.state in ["punching", "kicking", "hit"]:
-            return
-        self.ai_action_timer += 1
-        if self.ai_action_timer >= self.ai_action_duration:
-            self.ai_action_timer = 0
-            self.ai_action_duration = random.randint(30, 60)
-            action = random.choice(["move", "punch", "kick"])
-            if action == "move":
-                distance = opponent.x - self.x
-                if abs(distance) > 100:
-                    self.x += 5 if distance > 0 else -5
-                    self.facing = 1 if distance > 0 else -1
-                elif abs(distance) < 50:
-                    self.x -= 5 if distance > 0 else -5
-                self.x = max(self.head_radius, min(WIDTH - self.head_radius, self.x))
-                self.target_x = self.x
-            elif action == "punch":
-                self.punch()
-            elif action == "kick":
-                self.kick()
-
-    def punch(self):
-        if self.state == "idle":
-            self.state = "punching"
-            self.animation_frame = 0
-
-    def kick(self):
-        if self.state == "idle":
-            self.state = "kicking"
-            self.animation_frame = 0
+    def render_x(self, alpha=1.0):
+        return self.prev_x + (self.x - self.prev_x) * alpha
 
-    def update(self):
-        if self.state in ["punching", "kicking"]:
-            self.animation_frame += 0.5
-            if self.animation_frame > 20:
-                self.state = "idle"
-                self.animation_frame = 0
-        elif self.state == "hit":
-            self.animation_frame += 0.5
-            t = ease_in_out_cubic(self.animation_frame / 20)
-            self.x = self.x + (self.target_x - self.x) * t
-            if self.animation_frame > 20:
-                self.state = "idle"
-                self.animation_frame = 0
-        if self.hit_cooldown > 0:
-            self.hit_cooldown -= 1
-
-    def get_hitbox(self):
-        t = self.animation_frame / 20
-        if self.state == "punching" and t >= 0.3:
-            t = ease_in_out_cubic((t - 0.3) / 0.7)
-            return pygame.Rect(self.x + 20 * self.facing * (1 + 0.2 * t), self.y, 20, 20)
-        elif self.state == "kicking" and t >= 0.3:
-            t = ease_in_out_cubic((t - 0.3) / 0.7)
-            return pygame.Rect(self.x + 20 * self.facing * (1 + 0.2 * t), self.y + self.height, 20, 20)
-        return None
+    def draw(self, screen, alpha=1.0):
+        pose_cache.draw(screen, self, self.render_x(alpha))
 
-    def get_body_hitbox(self):
-        return pygame.Rect(self.x - self.width // 2, self.y - self.head_radius, 
-                         self.width, self.height + self.head_radius)
+    def bounds(self, alpha=1.0):
+        return pose_cache.bounds(self, self.render_x(alpha))
 
 # Game setup
 menu = Menu()
 ai_mode = True  # Enable AI mode by default for Player 2
-player1 = Player(200, HEIGHT - 60, RED, {
-    "left": pygame.K_a,
-    "right": pygame.K_d,
-    "punch": pygame.K_w,
-    "kick": pygame.K_s
-}, is_ai=False)
-player2 = Player(600, HEIGHT - 60, BLUE, {
-    "left": pygame.K_LEFT,
-    "right": pygame.K_RIGHT,
-    "punch": pygame.K_UP,
-    "kick": pygame.K_DOWN
-}, is_ai=ai_mode)
+match = sim.Match(ai_mode=ai_mode, player_cls=Player)
+player1, player2 = match.players
+inputs = InputLayer([player1.controls, player2.controls])
+sparks = ParticlePool(WHITE)  # Hit sparks and dust
+paused = False
+rewinding = False  # R held: step back through recent frames
 
 def setup():
     pass
 
-async def update_loop():
+def open_window(vsync=False):
+    # screen is the fixed WIDTH x HEIGHT canvas, scaled to the window by SDL
+    global screen
+    if screen is None:
+        screen = display.open_window((WIDTH, HEIGHT), "Stickman Fighting Game", vsync=vsync)
+    return screen
+
+def set_fullscreen(fullscreen):
+    global screen
+    screen = display.set_fullscreen((WIDTH, HEIGHT), fullscreen)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stickman Fighting Game")
+    parser.add_argument("--render-rate", default=str(FPS),
+                        help=f"frames per second to draw, '{UNCAPPED}' or '{DISPLAY}' (default {FPS}; "
+                             f"'{DISPLAY}' also turns on vsync)")
+    parser.add_argument("--frame-stats", action="store_true",
+                        help="print frame-time and input latency percentiles on exit")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="redraw and flip the whole fight scene every frame")
+    parser.add_argument("--fighters", type=int, default=2, metavar="N",
+                        help="free-for-all against N - 1 AI fighters instead of a duel")
+    parser.add_argument("--record-dir", metavar="DIR",
+                        help="save a replay of every match into DIR")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="watch a recorded match instead of playing")
+    parser.add_argument("--host", type=int, metavar="PORT",
+                        help="host an online match on this UDP port")
+    parser.add_argument("--join", metavar="HOST:PORT",
+                        help="join an online match")
+    parser.add_argument("--input-delay", type=int, default=netplay.INPUT_DELAY,
+                        help=f"online input delay in frames (default {netplay.INPUT_DELAY})")
+    parser.add_argument("--net-latency", type=float, default=0, metavar="MS",
+                        help="add this much simulated latency to outgoing packets")
+    parser.add_argument("--net-loss", type=float, default=0, metavar="PERCENT",
+                        help="drop this share of outgoing packets")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each frame phase from the start (F3 shows the overlay)")
+    parser.add_argument("--profile-csv", metavar="FILE",
+                        help="profile and write per-phase frame times to FILE on exit")
+    parser.add_argument("--cpu", choices=list(DIFFICULTY),
+                        help="player 2 is a lookahead search AI at this difficulty")
+    parser.add_argument("--rewind-seconds", type=float, default=REWIND_SECONDS, metavar="S",
+                        help=f"history kept for rewinding with R (default {REWIND_SECONDS}, "
+                             "0 turns rewind off)")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="integer-only sim, so recorded replays play back the same anywhere "
+                             "(always on online)")
+    parser.add_argument("--telemetry", metavar="FILE",
+                        help="record hits, damage, states and AI actions of the duel into FILE "
+                             "(python -m stickman.telemetry FILE for a report)")
+    parser.add_argument("--no-idle", dest="idle", action="store_false",
+                        help="keep drawing every frame in menus and while paused")
+    args, _ = parser.parse_known_args(argv)
+    if args.render_rate not in (UNCAPPED, DISPLAY):
+        args.render_rate = float(args.render_rate)
+    if args.rewind_seconds < 0:
+        parser.error("--rewind-seconds can't be negative")
+    return args
+
+def menu_open():
+    return menu.update_active or menu.main_active or menu.settings_active
+
+def screen_static():
+    # Nothing on screen changes until input arrives
+    return (menu_open() and menu.animation_frame >= 20) or (not menu_open() and paused)
+
+def fight_items(alpha, profiler=NULL_PROFILER, show_profiler=False):
+    # Everything in the fight scene as {name: (rect, key, draw)} for DirtyRenderer
+    items = {
+        "player1": (player1.bounds(alpha), pose_cache.pose_key(player1),
+                    lambda screen: player1.draw(screen, alpha)),
+        "player2": (player2.bounds(alpha), pose_cache.pose_key(player2),
+                    lambda screen: player2.draw(screen, alpha)),
+        "health1": (pygame.Rect(50, 50, 100, 20), player1.health,
+                    lambda screen: pygame.draw.rect(screen, RED, (50, 50, player1.health, 20))),
+        "health2": (pygame.Rect(WIDTH - 150, 50, 100, 20), player2.health,
+                    lambda screen: pygame.draw.rect(screen, BLUE, (WIDTH - 150, 50, player2.health, 20))),
+    }
+    add_effect_items(items)
+    add_overlay_items(items, profiler, show_profiler)
+    return items
+
+def brawl_items(brawl, alpha, profiler=NULL_PROFILER, show_profiler=False):
+    items = {}
+    for fighter in brawl.fighters:
+        items[fighter] = (fighter.bounds(alpha), pose_cache.pose_key(fighter),
+                          lambda screen, fighter=fighter: fighter.draw(screen, alpha))
+    health = max(player1.health, 0)
+    items["health1"] = (pygame.Rect(50, 50, 100, 20), health,
+                        lambda screen: pygame.draw.rect(screen, RED, (50, 50, health, 20)))
+    count = ui.render_text(f"{len(brawl.fighters)} standing", 28, BLACK)
+    rect = count.get_rect(topright=(WIDTH - 50, 50))
+    items["standing"] = (rect, len(brawl.fighters), lambda screen: screen.blit(count, rect))
+    add_effect_items(items)
+    add_overlay_items(items, profiler, show_profiler)
+    return items
+
+def add_effect_items(items):
+    item = sparks.item()
+    if item is not None:
+        items["sparks"] = item
+
+def step_effects(events):
+    # Once per sim frame, with the frame's hit events
+    sparks.update()
+    sparks.spawn_hits(events)
+
+def add_overlay_items(items, profiler, show_profiler):
+    if paused:
+        text = ui.render_text("Paused", 40, BLACK)
+        rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+        items["paused"] = (rect, True, lambda screen: screen.blit(text, rect))
+    if rewinding:
+        text = ui.render_text("Rewind", 40, BLACK)
+        rect = text.get_rect(center=(WIDTH // 2, 100))
+        items["rewind"] = (rect, True, lambda screen: screen.blit(text, rect))
+    if show_profiler:
+        items["profiler"] = (profiler.overlay_rect(), profiler.version(), profiler.draw_overlay)
+
+def start_brawl(count):
+    global player1
+    brawl = Brawl.spawn(count, humans=1, player_cls=Player)
+    player1 = brawl.fighters[0]
+    return brawl
+
+def start_recording(directory):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime("match-%Y%m%d-%H%M%S.stkr"))
+    return ReplayWriter(path, match)
+
+def load_replay(path):
+    global match, player1, player2
+    reader = ReplayReader(path)
+    match = reader.new_match(Player)
+    player1, player2 = match.players
+    menu.update_active = menu.main_active = menu.settings_active = False
+    return reader
+
+def start_deterministic():
+    global match, player1, player2
+    match = sim.Match(ai_mode=ai_mode, player_cls=Player, deterministic=True)
+    player1, player2 = match.players
+
+def start_cpu(level):
+    # Importing this script no longer opens a window, so the search can run
+    # in a spawned process as well as a forked one
+    player2.is_ai = False
+    return SearchWorker(1, level, deterministic=match.deterministic)
+
+async def start_netplay(args):
+    global match, player1, player2
+    match = netplay.new_match(Player)
+    player1, player2 = match.players
+    menu.update_active = menu.main_active = menu.settings_active = False
+    options = {"latency": args.net_latency / 1000, "jitter": args.net_latency / 4000,
+               "loss": args.net_loss / 100}
+    if args.host is not None:
+        session = netplay.RollbackSession(match, 0, input_delay=args.input_delay)
+        peer = await netplay.host(session, args.host, **options)
+    else:
+        address, port = args.join.rsplit(":", 1)
+        session = netplay.RollbackSession(match, 1, input_delay=args.input_delay)
+        peer = await netplay.join(session, address, int(port), **options)
+    return session, peer
+
+# Window events that mean the last frame has to be presented again
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED,
+                 pygame.WINDOWSIZECHANGED, pygame.WINDOWSHOWN)
+
+async def update_loop(args=None):
+    global paused, rewinding
+    if args is None:
+        args = parse_args([])
+    # Presenting at the display's rate is what vsync is for
+    open_window(vsync=args.render_rate == DISPLAY)
+    recorder = None
+    replay_reader = replay_inputs = None
+    if args.replay:
+        replay_reader = load_replay(args.replay)
+        replay_inputs = replay_reader.frames()
+    session = peer = None
+    if args.host is not None or args.join:
+        session, peer = await start_netplay(args)
+    elif args.deterministic and replay_reader is None:
+        start_deterministic()
+    desync_reported = False
+    brawl = start_brawl(args.fighters) if args.fighters > 2 else None
+    cpu = None
+    if args.cpu and brawl is None and session is None and replay_inputs is None:
+        cpu = start_cpu(args.cpu)
+    # Telemetry for the offline duel; rollback would record frames twice
+    telemetry = None
+    if args.telemetry and brawl is None and session is None:
+        telemetry = match.telemetry = Telemetry(args.telemetry)
+        telemetry.start_match(match)
+    # Rewind only the two-player fight, not while recording a replay or telemetry,
+    # and not with under a frame of history (--rewind-seconds 0 turns it off)
+    rewind = None
+    can_rewind = (RewindBuffer.frames_for(args.rewind_seconds) > 0
+                  and brawl is None and session is None and replay_inputs is None
+                  and not args.record_dir and telemetry is None)
+    if can_rewind:
+        rewind = RewindBuffer(args.rewind_seconds)
+        rewind.record(match)
+    profiler = FrameProfiler() if args.profile or args.profile_csv else NULL_PROFILER
+    show_profiler = False
+    match.profiler = profiler
+    if brawl is not None:
+        brawl.profiler = profiler
+    scheduler = FrameScheduler(sim_rate=FPS, render_rate=args.render_rate)
+    renderer = DirtyRenderer(WHITE, enabled=not args.full_redraw)
     running = True
+    presented_static = False
     while running:
-        for event in pygame.event.get():
+        idle = args.idle and presented_static and screen_static()
+        if idle:
+            events = await scheduler.wait_for_events()
+            profiler.lap("wait")
+        else:
+            events = pygame.event.get()
+        inputs.feed(events)
+        redraw = not idle
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.MOUSEBUTTONDOWN:
                 clicked, action = menu.check_button_click(event.pos)
                 if clicked:
-                    if action in ["fullscreen", "borderless"]:
+                    redraw = True
+                    if action in ["fullscreen", "windowed"]:
                         pass  # Handled in check_button_click
                     elif action == "play":
                         menu.active = False
-
-        if menu.update_active or menu.main_active or menu.settings_active:
-            menu.update()
-            screen.fill(WHITE)
+            if (event.type == pygame.KEYDOWN and event.key == pygame.K_p and not menu_open()
+                    and session is None):
+                paused = not paused
+                redraw = True
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key == pygame.K_r:
+                rewinding = event.type == pygame.KEYDOWN and can_rewind
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                if not profiler.enabled:
+                    profiler = match.profiler = FrameProfiler()
+                    if brawl is not None:
+                        brawl.profiler = profiler
+                show_profiler = not show_profiler
+                redraw = True
+                renderer.invalidate()
+            if event.type in REDRAW_EVENTS:
+                redraw = True
+                renderer.invalidate()
+        profiler.lap("events")
+        if not redraw:
+            # Idle and nothing changed: no draw, no flip. Idle is only ever
+            # the menu or pause, so no step takes the keys fed just now
+            inputs.skip()
+            profiler.end_frame()
+            continue
+
+        # Fixed 60 Hz simulation, however often we get to draw
+        if menu_open() or paused or rewinding or replay_inputs is not None:
+            inputs.skip()
+        for step in range(scheduler.steps()):
+            # Each step takes the input that arrived before it was due
+            until = scheduler.step_time(step)
+            if menu_open():
+                menu.update()
+                profiler.lap("update")
+            elif paused:
+                break
+            elif brawl is not None:
+                step_effects(brawl.step({0: inputs.buttons(0, player1, until)}))
+                inputs.skip(1)  # Only player 1 is human
+            elif session is not None:
+                # Online either set of keys drives your own fighter
+                local = match.players[session.local_player]
+                session.add_local_input(inputs.buttons(0, local, until)
+                                        | inputs.buttons(1, local, until))
+                peer.send_inputs()
+                hits = session.advance()
+                if hits is not None:
+                    step_effects(hits)
+                if session.desync_frame is not None and not desync_reported:
+                    print(f"Desync with the other player at frame {session.desync_frame}")
+                    desync_reported = True
+            elif replay_inputs is not None:
+                frame_inputs = next(replay_inputs, None)
+                if frame_inputs is None:
+                    # End of the replay, hold the last frame
+                    paused = True
+                    break
+                step_effects(match.step(*frame_inputs))
+            elif rewinding:
+                rewind.step_back(match)
+            else:
+                if cpu is None:
+                    buttons = (inputs.buttons(0, player1, until), inputs.buttons(1, player2, until))
+                else:
+                    buttons = (inputs.buttons(0, player1, until), cpu.poll(match))
+                    inputs.skip(1)  # Player 2's keys do nothing against the CPU
+                if recorder is None and args.record_dir:
+                    recorder = start_recording(args.record_dir)
+                step_effects(match.step(*buttons))
+                if recorder is not None:
+                    recorder.record(*buttons)
+                elif rewind is not None:
+                    rewind.record(match)
+
+        if menu_open():
             menu.draw(screen)
+            profiler.lap("menu")
+            if show_profiler:
+                profiler.draw_overlay(screen)
+                profiler.lap("overlay")
+            pygame.display.flip()
+            profiler.lap("present")
+            renderer.invalidate()
+        elif brawl is not None:
+            renderer.render(screen, brawl_items(brawl, scheduler.alpha, profiler, show_profiler), profiler)
         else:
-            keys = pygame.key.get_pressed()
-            player1.move(keys)
-            if player2.is_ai:
-                player2.ai_move(player1)
-            else:
-                player2.move(keys)
-
-            if keys[player1.controls["punch"]]:
-                player1.punch()
-            if keys[player1.controls["kick"]]:
-                player1.kick()
-            if not player2.is_ai:
-                if keys[player2.controls["punch"]]:
-                    player2.punch()
-                if keys[player2.controls["kick"]]:
-                    player2.kick()
-
-            # Check for hits
-            if player1.get_hitbox() and player2.get_body_hitbox().colliderect(player1.get_hitbox()):
-                if player2.hit_cooldown == 0 and player2.state != "hit":
-                    player2.state = "hit"
-                    player2.animation_frame = 0
-                    player2.health -= 10 if player1.state == "punching" else 15
-                    player2.hit_cooldown = 20
-                    player2.target_x = player2.x - 20 * player2.facing
-            if player2.get_hitbox() and player1.get_body_hitbox().colliderect(player2.get_hitbox()):
-                if player1.hit_cooldown == 0 and player1.state != "hit":
-                    player1.state = "hit"
-                    player1.animation_frame = 0
-                    player1.health -= 10 if player2.state == "punching" else 15
-                    player1.hit_cooldown = 20
-                    player1.target_x = player1.x - 20 * player1.facing
-
-            player1.update()
-            player2.update()
-
-            # Draw game
-            screen.fill(WHITE)
-            player1.draw(screen)
-            player2.draw(screen)
-            pygame.draw.rect(screen, RED, (50, 50, player1.health, 20))
-            pygame.draw.rect(screen, BLUE, (WIDTH - 150, 50, player2.health, 20))
-
-        pygame.display.flip()
-        clock.tick(FPS)
-        await asyncio.sleep(1.0 / FPS)
+            renderer.render(screen, fight_items(scheduler.alpha, profiler, show_profiler), profiler)
+        inputs.presented()
+
+        presented_static = screen_static() and not show_profiler
+        await scheduler.wait()
+        profiler.lap("wait")
+        profiler.end_frame()
+
+    if peer is not None:
+        peer.close()
+    if cpu is not None:
+        cpu.close()
+    if recorder is not None:
+        recorder.close()
+    if replay_reader is not None:
+        replay_reader.close()
+    if telemetry is not None:
+        telemetry.end_match(match)
+        telemetry.close()
+    if args.frame_stats:
+        print(scheduler.summary())
+        print(inputs.summary())
+    if args.profile_csv:
+        profiler.write_csv(args.profile_csv)
 
 if platform.system() == "Emscripten":
     asyncio.ensure_future(update_loop())
 else:
     if __name__ == "__main__":
-        asyncio.run(update_loop())
+        asyncio.run(update_loop(parse_args()))
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+from stickman import sim
+from stickman.batch import BatchMatch
+
+# Checks BatchMatch against the scalar sim.Match path, then times it.
+# Usage: python benchmarks/bench_batch.py [frames]
+
+def random_inputs(rng, n, frames):
+    # Hold each random button combination for a few frames so attacks connect
+    held = rng.integers(0, 16, size=(frames // 4 + 1, n, 2))
+    return np.repeat(held, 4, axis=0)[:frames]
+
+def check_parity(n=64, frames=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    matches = []
+    for i in range(n):
+        match = sim.Match(ai_mode=False, seed=i)
+        # Start close together so plenty of hits happen
+        match.player1.x = match.player1.target_x = 300 + i
+        match.player2.x = match.player2.target_x = 360 + i
+        matches.append(match)
+    batch = BatchMatch.from_players([m.players for m in matches])
+    inputs = random_inputs(rng, n, frames)
+    hits = 0
+    for frame in range(frames):
+        taken = batch.step(inputs[frame])
+        for i, match in enumerate(matches):
+            for event in match.step(int(inputs[frame, i, 0]), int(inputs[frame, i, 1])):
+                hits += 1
+                assert taken[i, event.defender] == event.damage, (frame, i, event)
+            for j, player in enumerate(match.players):
+                assert abs(batch.x[i, j] - player.x) < 1e-9, (frame, i, j)
+                assert batch.facing[i, j] == player.facing
+                assert batch.state[i, j] == player.state, (frame, i, j)
+                assert batch.animation_frame[i, j] == player.animation_frame
+                assert batch.health[i, j] == player.health
+                assert batch.hit_cooldown[i, j] == player.hit_cooldown
+                assert abs(batch.target_x[i, j] - player.target_x) < 1e-9
+    return hits
+
+def bench(n, frames):
+    batch = BatchMatch(n, ai=(True, True), seed=n)
+    start = time.perf_counter()
+    for _ in range(frames):
+        batch.step()
+    elapsed = time.perf_counter() - start
+    return frames / elapsed, n * frames / elapsed
+
+def bench_scalar(frames):
+    match = sim.Match(ai_mode=True, seed=0)
+    match.player1.is_ai = True
+    start = time.perf_counter()
+    match.run(frames)
+    return frames / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    hits = check_parity()
+    print(f"parity ok ({hits} hits compared)")
+    print(f"scalar Match:      {bench_scalar(frames * 10):>14,.0f} match-frames/s")
+    for n in (1, 1_000, 100_000):
+        steps, match_frames = bench(n, frames if n < 100_000 else max(frames // 10, 10))
+        print(f"BatchMatch N={n:<7,} {steps:>10,.0f} steps/s {match_frames:>14,.0f} match-frames/s")
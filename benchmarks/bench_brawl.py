@@ -0,0 +1,61 @@
+import random
+import sys
+import time
+
+import common
+
+from stickman import sim
+from stickman.brawl import Brawl
+
+# Free-for-all hit resolution: checks the sweep broad phase against all-pairs
+# and against the two-player Match, then times a frame from 2 to 5,000 fighters.
+# Usage: python benchmarks/bench_brawl.py [frames]
+
+def check_two_player(frames=3000):
+    match = sim.Match(ai_mode=True, seed=7)
+    match.player1.x = match.player1.target_x = 540
+    player1, player2 = sim.default_players(True, player_cls=sim.Player)
+    player1.load_state(match.player1.save_state())
+    player2.load_state(match.player2.save_state())
+    brawl = Brawl([player1, player2], seed=7, remove_knocked_out=False)
+    rng = random.Random(1)
+    for _ in range(frames):
+        buttons = rng.randrange(16)
+        assert match.step(buttons) == brawl.step({0: buttons})
+        assert [p.save_state() for p in match.players] == [f.save_state() for f in brawl.fighters]
+
+def check_broad_phase(count=300, frames=600):
+    brawls = [Brawl.spawn(count, humans=0, seed=3, broad_phase=flag) for flag in (True, False)]
+    hits = 0
+    for _ in range(frames):
+        events = [b.step() for b in brawls]
+        assert events[0] == events[1]
+        hits += len(events[0])
+    return hits
+
+def bench(count, broad_phase, frames):
+    brawl = Brawl.spawn(count, humans=0, seed=count, broad_phase=broad_phase,
+                        remove_knocked_out=False)
+    # Let the AI timers run out so fighters are attacking
+    for _ in range(90):
+        brawl.step()
+    brawl.checks = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        brawl.step()
+    elapsed = time.perf_counter() - start
+    return elapsed / frames * 1000, brawl.checks / frames
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    check_two_player()
+    print(f"2 fighters match sim.Match, broad phase matches all-pairs ({check_broad_phase()} hits)")
+    for count in (2, 10, 100, 500, 1000, 2000, 5000):
+        line = f"{count:>5} fighters"
+        for broad_phase in (True, False):
+            if not broad_phase and count > 1000:
+                continue
+            ms, checks = bench(count, broad_phase, frames)
+            label = "sweep" if broad_phase else "all-pairs"
+            line += f"  {label} {ms:8.3f} ms/frame ({checks:,.0f} rect tests)"
+        print(line)
@@ -0,0 +1,129 @@
+import hashlib
+import random
+import sys
+import time
+
+import common
+
+from stickman import netplay, sim
+
+# Deterministic sim: what the integer maths and a per-frame checksum cost
+# next to the float sim, a digest of a long run to compare between machines
+# (it has to print the same everywhere), and a check that a desync is caught
+# at the frame it happens. For that two rollback sessions play each other
+# in-process with a few ticks of delay, one of them with a hit pull table
+# that is off in one entry, like a platform whose maths rounds differently.
+# Usage: python benchmarks/bench_determinism.py [frames per seed]
+
+BAD_PULL = list(sim.FIXED_HIT_PULL)
+BAD_PULL[10] += sim.FIXED_ONE // 16
+
+class SkewedPullPlayer(sim.Deterministic, sim.Player):
+    __slots__ = ()
+
+    def pull_to_target(self):
+        self.x += sim.fixed_mul(self.target_x - self.x, BAD_PULL[self.animation_frame])
+
+def close_match(player_cls=sim.Player, deterministic=True, seed=0):
+    # Fighters start in reach of each other so there's plenty of knockback
+    match = sim.Match(ai_mode=False, seed=seed, player_cls=player_cls, deterministic=deterministic)
+    for player, x in zip(match.players, (360, 420)):
+        player.x = player.prev_x = player.target_x = x
+    return match
+
+def held_inputs(frames, seed):
+    # Random buttons held for 8 frames at a time, per player
+    rng = random.Random(seed)
+    inputs = []
+    for frame in range(frames):
+        if frame % 8:
+            inputs.append(inputs[-1])
+        else:
+            inputs.append((rng.randrange(16), rng.randrange(16)))
+    return inputs
+
+def cost(fn, repeat=20_000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def digest(frames):
+    # Checksum of every frame of a few seeded matches, hashed together
+    h = hashlib.sha256()
+    for seed in range(4):
+        match = close_match(seed=seed)
+        match.player2.is_ai = seed % 2 == 0
+        for buttons in held_inputs(frames, seed):
+            match.step(*buttons)
+            h.update(match.checksum().to_bytes(4, "little"))
+    return h.hexdigest()
+
+def first_difference(inputs, player_classes):
+    # First frame whose starting state differs between the two player classes
+    matches = [close_match(cls) for cls in player_classes]
+    for frame, buttons in enumerate(inputs):
+        if matches[0].save_state() != matches[1].save_state():
+            return frame
+        for match in matches:
+            match.step(*buttons)
+    return None
+
+def play_peers(inputs, player_classes, delay=4):
+    # Two sessions exchanging inputs and checksums through a delay line
+    sessions = [netplay.RollbackSession(close_match(cls), i)
+                for i, cls in enumerate(player_classes)]
+    in_flight = []
+    tick = 0
+    while not all(s.frame >= len(inputs) for s in sessions):
+        for i, session in enumerate(sessions):
+            frame = session.last_local_frame
+            if frame < len(inputs):
+                session.add_local_input(inputs[frame][i])
+            start, sent = session.unacked_local_inputs()
+            in_flight.append((tick + delay, 1 - i, session.last_remote_frame, start, bytes(sent),
+                              session.latest_checksum()))
+        for message in [m for m in in_flight if m[0] <= tick]:
+            in_flight.remove(message)
+            _, to, ack, start, sent, (frame, checksum) = message
+            sessions[to].add_remote_ack(ack)
+            sessions[to].add_remote_inputs(start, sent)
+            sessions[to].add_remote_checksum(frame, checksum)
+        for session in sessions:
+            if session.frame < len(inputs):
+                session.advance()
+        tick += 1
+    return sessions
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    assert all(type(v) is int for v in sim.FIXED_HIT_PULL)
+    assert all(type(v) is int for boxes in sim.FIXED_HITBOXES for box in boxes if box
+               for v in box)
+    print(f"digest of 4 x {frames} frames: {digest(frames)}")
+
+    float_match = close_match(deterministic=False)
+    fixed_match = close_match()
+    float_step = cost(lambda: float_match.step(sim.PUNCH, sim.PUNCH))
+    fixed_step = cost(lambda: fixed_match.step(sim.PUNCH, sim.PUNCH))
+    checksum = cost(fixed_match.checksum)
+    print(f"step: float {float_step * 1e6:.2f} us, deterministic {fixed_step * 1e6:.2f} us; "
+          f"checksum {checksum * 1e6:.2f} us ({checksum * sim.FPS * 100:.4f}% of a 60 Hz second)")
+
+    # Sessions have no input for their first input_delay frames
+    inputs = [(0, 0)] * netplay.INPUT_DELAY + held_inputs(3000, 7)[netplay.INPUT_DELAY:]
+    good = sim.deterministic_player()
+    sessions = play_peers(inputs, (good, good))
+    synced = all(s.desync_frame is None for s in sessions)
+    same = len({s.match.checksum() for s in sessions}) == 1
+    print(f"matching peers: {sum(s.rollbacks for s in sessions)} rollbacks, "
+          f"{'in sync' if synced and same else 'DESYNC'}")
+
+    expected = first_difference(inputs, (good, SkewedPullPlayer))
+    sessions = play_peers(inputs, (good, SkewedPullPlayer))
+    detected = [s.desync_frame for s in sessions]
+    print(f"skewed peer: states first differ at frame {expected}, "
+          f"detected at frame {detected[0]} / {detected[1]}")
+    ok = synced and same and expected is not None and detected == [expected, expected]
+    sys.exit(0 if ok else 1)
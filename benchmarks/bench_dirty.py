@@ -0,0 +1,31 @@
+import sys
+import time
+
+import common
+
+from stickman.render import DirtyRenderer
+
+# Fight-scene render cost: full redraw + flip versus dirty rectangles.
+# Usage: python benchmarks/bench_dirty.py [frames]
+
+def run(game, enabled, frames):
+    renderer = DirtyRenderer(game.WHITE, enabled=enabled)
+    game.player1.is_ai = True
+    area = 0
+    elapsed = 0.0
+    for _ in range(frames):
+        game.match.step()
+        start = time.perf_counter()
+        renderer.render(game.screen, game.fight_items(1.0))
+        elapsed += time.perf_counter() - start
+        area += renderer.dirty_area
+    screen_area = game.WIDTH * game.HEIGHT
+    return elapsed / frames * 1e6, area / frames / screen_area * 100
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    game = common.load_game("V3")
+    for enabled in (False, True):
+        per_frame, area = run(game, enabled, frames)
+        label = "dirty rects" if enabled else "full redraw"
+        print(f"{label:<12} {per_frame:8.1f} us/frame, {area:5.1f}% of the screen redrawn")
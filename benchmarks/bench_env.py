@@ -0,0 +1,66 @@
+import sys
+import time
+
+import numpy as np
+
+import common
+
+from stickman.env import ACTIONS, FighterEnv, VectorEnv
+
+# Training environment throughput: env-steps/s for FighterEnv and for
+# VectorEnv at a few batch sizes, after checking that both give the same
+# observations, rewards and episode ends for the same actions.
+# Usage: python benchmarks/bench_env.py [seconds per size]
+
+def check_parity(n=16, steps=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    envs = [FighterEnv(opponent="none", max_frames=600) for _ in range(n)]
+    scalar = np.array([env.reset(seed=0)[0] for env in envs])
+    vector = VectorEnv(n, opponent="none", max_frames=600)
+    obs, _ = vector.reset()
+    assert np.array_equal(obs, scalar)
+    episodes = 0
+    for step in range(steps):
+        # Mostly punches and moving in, so games do end by knockout
+        actions = rng.choice(len(ACTIONS), size=n, p=[0.1, 0.1, 0.3, 0.4, 0.1])
+        obs, reward, terminated, truncated, _ = vector.step(actions)
+        for i, env in enumerate(envs):
+            o, r, term, trunc, _ = env.step(actions[i])
+            if term or trunc:
+                o, _ = env.reset(seed=0)
+                episodes += 1
+            assert (r, term, trunc) == (reward[i], terminated[i], truncated[i]), (step, i)
+            assert np.array_equal(o, obs[i]), (step, i)
+    return episodes
+
+def bench_scalar(seconds):
+    env = FighterEnv(seed=0)
+    env.reset()
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(1000):
+            _, _, term, trunc, _ = env.step(steps % len(ACTIONS))
+            if term or trunc:
+                env.reset()
+            steps += 1
+    return steps / (time.perf_counter() - start)
+
+def bench_vector(n, seconds):
+    env = VectorEnv(n, seed=0)
+    env.reset()
+    actions = np.random.default_rng(0).integers(len(ACTIONS), size=(64, n))
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for row in actions:
+            env.step(row)
+        steps += len(actions) * n
+    return steps / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    print(f"parity ok ({check_parity()} episodes compared)")
+    print(f"FighterEnv:        {bench_scalar(seconds):>12,.0f} env-steps/s")
+    for n in (1, 64, 1024, 16384):
+        print(f"VectorEnv N={n:<6} {bench_vector(n, seconds):>12,.0f} env-steps/s")
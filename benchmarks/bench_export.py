@@ -0,0 +1,91 @@
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+import common
+
+import pygame
+
+from stickman import export, sim
+from stickman.replay import ReplayWriter
+
+# Replay export speed against real time: records a match of random held
+# inputs against the AI, then exports it as raw frames (hashed, not kept)
+# and as PNGs on 1 worker and on one per core. Checks the pooled, chunked
+# raw output matches one straight render of the whole match, frame for frame,
+# sparks included, and that the PNGs decode to the same pixels.
+# Usage: python benchmarks/bench_export.py [seconds of match]
+
+class HashSink:
+    def __init__(self):
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        self.size += len(data)
+
+def record(path, frames, seed=0):
+    match = sim.Match(seed=seed)
+    match.player1.x = match.player1.target_x = 360
+    match.player2.x = match.player2.target_x = 420
+    rng = random.Random(seed)
+    with ReplayWriter(path, match) as writer:
+        for frame in range(frames):
+            if frame % 8 == 0:
+                buttons = rng.randrange(16)
+            match.step(buttons)
+            writer.record(buttons, 0)
+
+def serial_hash(path):
+    # The whole replay as one range in this process
+    jobs = export.plan(path, chunk_frames=1 << 30)
+    renderer = export.FrameRenderer(path)
+    digest = hashlib.sha256()
+    with_sparks = 0
+    for first, snapshot, sparks, inputs in jobs:
+        for canvas in renderer.frames(snapshot, sparks, inputs):
+            digest.update(pygame.image.tobytes(canvas, "RGB"))
+            with_sparks += renderer.game.sparks.count > 0
+    return digest.hexdigest(), with_sparks
+
+def timed(label, frames, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:6.2f} s, {frames / elapsed:7.0f} frames/s, "
+          f"{frames / sim.FPS / elapsed:5.1f}x real time")
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    frames = int(seconds * sim.FPS)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "bench.stkr")
+    record(path, frames)
+    cores = os.cpu_count()
+    print(f"{frames} frames ({seconds:g} s of match), {cores} cores")
+
+    expected, with_sparks = serial_hash(path)
+    print(f"{with_sparks} frames with hit sparks")
+    ok = with_sparks > 0
+    for workers in sorted({1, cores}):
+        sink = HashSink()
+        timed(f"raw, {workers} worker(s)", frames,
+              lambda: export.export(path, raw=sink, workers=workers))
+        ok &= sink.hash.hexdigest() == expected and sink.size == frames * export.FRAME_BYTES
+        png_dir = os.path.join(directory, f"png{workers}")
+        timed(f"png, {workers} worker(s)", frames,
+              lambda: export.export(path, png_dir=png_dir, workers=workers))
+        ok &= len(os.listdir(png_dir)) == frames
+    # The PNGs decode to the same pixels as the raw stream
+    last = pygame.image.load(os.path.join(png_dir, export.PNG_NAME.format(frames - 1)))
+    renderer = export.FrameRenderer(path)
+    first, snapshot, sparks, inputs = export.plan(path)[-1]
+    for canvas in renderer.frames(snapshot, sparks, inputs):
+        pass
+    ok &= pygame.image.tobytes(last, "RGB") == pygame.image.tobytes(canvas, "RGB")
+    print("pooled output matches a serial render, PNGs match the raw frames" if ok else "MISMATCH")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,53 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import common
+
+from stickman import sim
+from stickman.brawl import Brawl
+
+# Memory per fighter and per-tick cost for crowds and snapshots.
+# Usage: python benchmarks/bench_fighters.py [fighters]
+
+def memory_per_fighter(count):
+    rng = random.Random(0)
+    controls = sim.default_players(False, rng)[0].controls
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fighters = [sim.Player(rng.uniform(20, 780), sim.HEIGHT - 60, (255, 0, 0), controls,
+                           is_ai=True, rng=rng) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(fighters)
+
+def fighter_ticks(count, frames=120):
+    brawl = Brawl.spawn(count, humans=0, seed=1, remove_knocked_out=False)
+    for _ in range(60):
+        brawl.step()
+    start = time.perf_counter()
+    for _ in range(frames):
+        for fighter in brawl.fighters:
+            fighter.update()
+    update = count * frames / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(frames):
+        brawl.step()
+    step = count * frames / (time.perf_counter() - start)
+    return update, step
+
+def snapshots(repeat=100_000):
+    match = sim.Match(seed=0)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        match.save_state()
+    return repeat / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"memory per fighter:   {memory_per_fighter(10_000):8.0f} bytes")
+    update, step = fighter_ticks(count)
+    print(f"Player.update:        {update:12,.0f} fighter-ticks/s")
+    print(f"Brawl.step ({count}):  {step:12,.0f} fighter-ticks/s")
+    print(f"Match.save_state:     {snapshots():12,.0f} snapshots/s")
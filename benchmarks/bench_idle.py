@@ -0,0 +1,41 @@
+import asyncio
+import sys
+import time
+
+import common
+
+import pygame
+
+# CPU use of V3 sitting on the settled main menu, with and without idle mode.
+# Usage: python benchmarks/bench_idle.py [seconds]
+
+def run_menu(seconds, idle):
+    game = common.load_game("V3")
+    game.menu.update_active = False
+    game.menu.main_active = True
+    game.menu.animation_frame = 20
+    game.menu.scale = 1
+    flips = [0]
+    flip = pygame.display.flip
+
+    def counting_flip():
+        flips[0] += 1
+        flip()
+
+    game.pygame.display.flip = counting_flip
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), 1)
+    args = game.parse_args([] if idle else ["--no-idle"])
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    asyncio.run(game.update_loop(args))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    pygame.display.flip = flip
+    return cpu / wall * 100, flips[0] / wall
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    for idle in (False, True):
+        cpu, fps = run_menu(seconds, idle)
+        label = "idle mode" if idle else "always draw"
+        print(f"{label:<12} CPU {cpu:5.1f}% of one core, {fps:6.1f} flips/s")
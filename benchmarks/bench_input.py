@@ -0,0 +1,104 @@
+import asyncio
+import random
+import sys
+
+import common
+
+import pygame
+
+from stickman import sim
+from stickman.inputs import InputLayer
+
+# Input handling: how many punch presses turn into punches when keys are
+# polled once per frame versus fed through the timestamped InputLayer, on
+# the same scripted key timeline (short taps, presses during recovery).
+# Then input-to-present latency measured in a headless run of the game.
+# Usage: python benchmarks/bench_input.py [seconds]
+
+def timeline(seconds, seed=0):
+    # (time, key, down): punch taps of 4-40 ms every 0.3-1 s, plus walking
+    rng = random.Random(seed)
+    controls = sim.default_players(False)[0].controls
+    events = []
+    t = 0.5
+    while t < seconds:
+        events.append((t, controls["punch"], True))
+        events.append((t + rng.uniform(0.004, 0.040), controls["punch"], False))
+        if rng.random() < 0.3:
+            key = controls[rng.choice(["left", "right"])]
+            start = t + rng.uniform(0, 0.05)
+            events.append((start, key, True))
+            events.append((start + rng.uniform(0.05, 0.3), key, False))
+        t += rng.uniform(0.3, 1.0)
+    events.sort()
+    return controls, events
+
+def step_punched(match, buttons):
+    # True if player 1 started a punch this step
+    before = match.player1.state
+    match.step(buttons, 0)
+    return match.player1.state == sim.PUNCHING and before != sim.PUNCHING
+
+def run_polled(controls, events, seconds):
+    match = sim.Match(ai_mode=False, seed=0)
+    count = 0
+    held = set()
+    i = 0
+    for frame in range(int(seconds * sim.FPS)):
+        now = frame / sim.FPS
+        while i < len(events) and events[i][0] <= now:
+            _, key, down = events[i]
+            (held.add if down else held.discard)(key)
+            i += 1
+        keys = {key: key in held for key in controls.values()}
+        count += step_punched(match, sim.buttons_from_keys(keys, controls))
+    return count
+
+def run_buffered(controls, events, seconds, buffer_frames):
+    match = sim.Match(ai_mode=False, seed=0)
+    layer = InputLayer([controls], buffer_frames=buffer_frames)
+    count = 0
+    i = 0
+    for frame in range(int(seconds * sim.FPS)):
+        now = frame / sim.FPS
+        # Each event is fed with its own time, as if pumped the moment it happened
+        while i < len(events) and events[i][0] <= now:
+            t, key, down = events[i]
+            event = pygame.event.Event(pygame.KEYDOWN if down else pygame.KEYUP, key=key)
+            layer.feed([event], now=t)
+            i += 1
+        count += step_punched(match, layer.buttons(0, match.player1))
+    return count
+
+async def drive_game(game, seconds):
+    # Tap punch and walk now and then, then quit
+    rng = random.Random(1)
+    controls = game.player1.controls
+    elapsed = 0.0
+    while elapsed < seconds:
+        key = controls[rng.choice(["punch", "punch", "left", "right"])]
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+        await asyncio.sleep(0.03)
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key))
+        delay = rng.uniform(0.1, 0.3)
+        await asyncio.sleep(delay)
+        elapsed += 0.03 + delay
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+async def game_latency(seconds):
+    game = common.load_game("V3")
+    game.menu.update_active = game.menu.main_active = game.menu.settings_active = False
+    await asyncio.gather(game.update_loop(game.parse_args([])), drive_game(game, seconds))
+    return game.inputs.summary()
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    controls, events = timeline(seconds)
+    presses = sum(1 for _, key, down in events if down and key == controls["punch"])
+    print(f"{presses} punch presses over {seconds:.0f} s of scripted input:")
+    print(f"  polled once a frame:       {run_polled(controls, events, seconds):5} punches")
+    print(f"  InputLayer, no buffering:  {run_buffered(controls, events, seconds, 0):5} punches")
+    for frames in (4, 8, 16):
+        print(f"  InputLayer, {frames:2} frame buffer: "
+              f"{run_buffered(controls, events, seconds, frames):5} punches")
+    print("headless game:", asyncio.run(game_latency(min(seconds, 5.0))))
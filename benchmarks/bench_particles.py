@@ -0,0 +1,77 @@
+import gc
+import sys
+import time
+
+import common
+
+from stickman.particles import DUST, SPARKS, ParticlePool
+from stickman.render import DirtyRenderer
+from stickman.scheduler import percentile
+
+# Particle stress test: the fight scene with 50k live sparks and dust, kept
+# topped up with fresh bursts as old ones die, drawn full-screen every frame
+# (update, spawn, draw, present). Frame times against the 60 FPS budget, the
+# split between update and draw, and a check that the Python object count
+# doesn't grow with the particles.
+# Usage: python benchmarks/bench_particles.py [particles] [frames]
+
+BURST = 250
+
+def top_up(pool, target):
+    rng = pool.rng
+    while pool.count < target:
+        x, y = rng.integers(0, 800), rng.integers(0, 600)
+        colors = SPARKS if rng.random() < 0.7 else DUST
+        pool.spawn(x, y, min(BURST, target - pool.count), 6.0, (0, 6.3), (60, 180), colors, 0.05)
+
+def timed(fn, times):
+    start = time.perf_counter()
+    fn()
+    times.append(time.perf_counter() - start)
+
+if __name__ == "__main__":
+    particles = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    game = common.load_game("V3")
+    game.menu.update_active = False
+    pool = game.sparks = ParticlePool(game.WHITE, capacity=particles, seed=0)
+    renderer = DirtyRenderer(game.WHITE, enabled=False)
+    top_up(pool, particles)
+    for _ in range(30):
+        pool.update()
+        top_up(pool, particles)
+
+    frame_times, update_times, draw_times = [], [], []
+    live = []
+    gc.collect()
+    objects = len(gc.get_objects())
+    draw = pool.draw
+
+    def timed_draw(screen):
+        timed(lambda: draw(screen), draw_times)
+    for _ in range(frames):
+        start = time.perf_counter()
+        timed(pool.update, update_times)
+        top_up(pool, particles)
+        live.append(pool.count)
+        items = game.fight_items(1.0)
+        rect, key, _ = items["sparks"]
+        items["sparks"] = (rect, key, timed_draw)
+        renderer.render(game.screen, items)
+        frame_times.append(time.perf_counter() - start)
+    del items, rect, key
+    gc.collect()
+    grown = len(gc.get_objects()) - objects
+
+    budget = 1 / 60
+    frame_times.sort()
+    print(f"{min(live):,}-{max(live):,} live particles, {frames} frames")
+    print(f"frame  mean {sum(frame_times) / frames * 1000:6.2f} ms, "
+          f"p99 {percentile(frame_times, 99) * 1000:6.2f} ms, max {frame_times[-1] * 1000:6.2f} ms "
+          f"({frames / sum(frame_times):,.0f} FPS)")
+    print(f"update mean {sum(update_times) / frames * 1000:6.2f} ms, "
+          f"draw mean {sum(draw_times) / frames * 1000:6.2f} ms")
+    print(f"Python objects after {frames} frames: {grown:+d}")
+    ok = percentile(frame_times, 99) <= budget and grown < 100
+    print("holds 60 FPS" if ok else "MISSES 60 FPS")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,68 @@
+import sys
+import time
+
+import common
+
+import pygame
+from pygame._sdl2 import video
+
+from stickman.render import DirtyRenderer
+
+# Present cost of the 800x600 fight scene shown at 1080p and 4K:
+#   software stretch - scaling the canvas on the CPU every frame, which is
+#                      what a fullscreen 800x600 mode comes down to when
+#                      the monitor can't switch to it
+#   SCALED upload    - the CPU side of the SCALED window: copying the
+#                      canvas into a texture, the same at any output size
+#   SCALED present   - upload, stretch and present through an SDL renderer
+# The stretch in the last one runs on the GPU with a hardware renderer.
+# Headless there's only SDL's software renderer, so it's CPU work here.
+# Usage: python benchmarks/bench_present.py [frames]
+
+SIZES = {"1080p": (1920, 1080), "4K": (3840, 2160)}
+
+def fight_canvas():
+    game = common.load_game("V3")
+    game.menu.update_active = False
+    game.player1.x = game.player1.target_x = 380
+    game.match.run(20, lambda match: (game.sim.PUNCH, 0))
+    canvas = pygame.Surface((game.WIDTH, game.HEIGHT))
+    DirtyRenderer(game.WHITE, enabled=False).render(canvas, game.fight_items(1.0))
+    return canvas
+
+def per_frame_ms(fn, frames):
+    fn()
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1000
+
+def make_renderer(window):
+    try:
+        return video.Renderer(window, accelerated=1), "hardware"
+    except video.error:
+        return video.Renderer(window, accelerated=0), "software"
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    canvas = fight_canvas()
+    for label, size in SIZES.items():
+        stretched = pygame.Surface(size)
+        software = per_frame_ms(lambda: pygame.transform.scale(canvas, size, stretched), frames)
+
+        window = video.Window("present", size=size, hidden=True)
+        renderer, kind = make_renderer(window)
+        renderer.logical_size = canvas.get_size()
+        texture = video.Texture(renderer, canvas.get_size(), streaming=True)
+        upload = per_frame_ms(lambda: texture.update(canvas), frames)
+
+        def present():
+            texture.update(canvas)
+            renderer.clear()
+            texture.draw()
+            renderer.present()
+        scaled = per_frame_ms(present, frames)
+        window.destroy()
+
+        print(f"{label:>5} {size[0]}x{size[1]}: software stretch {software:6.2f} ms, "
+              f"SCALED upload {upload:5.2f} ms, SCALED present ({kind} renderer) {scaled:6.2f} ms")
@@ -0,0 +1,72 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import common
+
+from stickman import sim
+from stickman.rewind import SNAPSHOT_SIZE, RewindBuffer
+
+# Rewind buffer: cost of a snapshot and a step back, whether recording
+# allocates, memory per second of history, and a check that rewinding then
+# replaying the same inputs lands on exactly the same states.
+# Usage: python benchmarks/bench_rewind.py [seconds of history]
+
+def ai_match(seed=0):
+    match = sim.Match(seed=seed)
+    match.player1.is_ai = True
+    match.player1.x = match.player1.target_x = 360
+    match.player2.x = match.player2.target_x = 420
+    return match
+
+def check_round_trip(rewind, frames=1200, back=400):
+    match = ai_match(1)
+    rng = random.Random(0)
+    inputs = [(rng.randrange(16), rng.randrange(16)) for _ in range(frames)]
+    match.player1.is_ai = False
+    states = []
+    rewind.record(match)
+    for buttons in inputs:
+        match.step(*buttons)
+        rewind.record(match)
+        states.append(match.save_state())
+    for _ in range(back):
+        assert rewind.step_back(match)
+    assert match.save_state() == states[frames - back - 1]
+    # Play on from there with the same inputs: every state has to come out the same
+    for i in range(frames - back, frames):
+        match.step(*inputs[i])
+        rewind.record(match)
+        assert match.save_state() == states[i], i
+
+def cost(fn, repeat=100_000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    check_round_trip(RewindBuffer(seconds))
+    print("rewind and replay ok")
+
+    rewind = RewindBuffer(seconds)
+    match = ai_match()
+    match.run(300)
+    record = cost(lambda: rewind.record(match))
+    step_back = cost(lambda: rewind.step_back(match) or rewind.record(match))
+    step = cost(lambda: match.step(), 20_000)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(10_000):
+        rewind.record(match)
+    grown = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"snapshot {SNAPSHOT_SIZE} bytes, {rewind.bytes_per_second:,} bytes per second of "
+          f"history, {len(rewind.data) / 1024:.1f} KiB for {seconds:g} s")
+    print(f"record {record * 1e6:.2f} us ({record * sim.FPS * 100:.3f}% of a 60 Hz second), "
+          f"step back and re-record {step_back * 1e6:.2f} us, sim step {step * 1e6:.2f} us")
+    print(f"memory held after 10,000 records: {grown} bytes")
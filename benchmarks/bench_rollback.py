@@ -0,0 +1,90 @@
+import asyncio
+import random
+import sys
+import time
+
+import common
+
+from stickman import netplay, sim
+
+# Rollback costs (snapshot, restore, re-simulation) and how many frames of
+# rollback fit in a frame budget, then a two-peer match over localhost UDP
+# with simulated latency and packet loss that has to stay in sync.
+# Usage: python benchmarks/bench_rollback.py [latency_ms] [loss_percent] [input_delay]
+
+def timeit(fn, repeat=20000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def bench_costs(budget=1.0 / sim.FPS / 2):
+    match = netplay.new_match()
+    match.player1.x = match.player1.target_x = 560
+    match.run(100, lambda m: (random.randrange(16), random.randrange(16)))
+    state = match.save_state()
+    save = timeit(match.save_state)
+    load = timeit(lambda: match.load_state(state))
+    step = timeit(lambda: match.step(sim.PUNCH, sim.KICK))
+    # A rollback of n frames costs one restore plus n snapshots and steps
+    window = int((budget - load) / (save + step))
+    print(f"snapshot {save * 1e6:6.2f} us, restore {load * 1e6:6.2f} us, "
+          f"step {step * 1e6:6.2f} us")
+    print(f"rollback window in {budget * 1000:.1f} ms: {window} frames")
+
+async def run_pair(latency, loss, input_delay=netplay.INPUT_DELAY, frames=600, port=47810):
+    sessions = [netplay.RollbackSession(netplay.new_match(), i, input_delay=input_delay)
+                for i in range(2)]
+    host = await netplay.host(sessions[0], port, bind="127.0.0.1",
+                              latency=latency, jitter=latency / 4, loss=loss, seed=1)
+    guest = await netplay.join(sessions[1], "127.0.0.1", port,
+                               latency=latency, jitter=latency / 4, loss=loss, seed=2)
+    peers = [host, guest]
+    rngs = [random.Random(10), random.Random(20)]
+    sent = [{}, {}]
+    start = time.perf_counter()
+    tick = 0
+    # Play until both sides have simulated every frame with confirmed inputs
+    while not all(s.frame == frames and s.last_remote_frame >= frames - 1
+                  and s.rollback_to is None for s in sessions):
+        for i, (session, peer) in enumerate(zip(sessions, peers)):
+            frame = session.frame + session.input_delay
+            if frame < frames and frame not in session.local_inputs:
+                # Hold each random input for a few frames like a person would
+                buttons = sent[i].get(frame - 1, 0) if frame % 8 else rngs[i].randrange(16)
+                sent[i][frame] = buttons
+                session.add_local_input(buttons)
+            peer.send_inputs()
+            session.advance()
+        tick += 1
+        await asyncio.sleep(1.0 / sim.FPS)
+    elapsed = time.perf_counter() - start
+    for peer in peers:
+        peer.close()
+
+    for i, session in enumerate(sessions):
+        print(f"peer {i}: {session.rollbacks} rollbacks, "
+              f"{session.resimulated_frames} frames re-simulated, {session.stalls} stalls, "
+              f"{peers[i].packets_sent} packets sent / {peers[i].packets_received} received")
+    print(f"{frames} frames in {tick} ticks, {elapsed:.1f} s")
+
+    # Both sides and a plain offline run of the same inputs must agree
+    offline = netplay.new_match()
+    for frame in range(frames):
+        offline.step(sent[0].get(frame, 0), sent[1].get(frame, 0))
+    crcs = {s.match.checksum() for s in sessions}
+    crcs.add(offline.checksum())
+    if len(crcs) != 1 or any(s.desync_frame is not None for s in sessions):
+        print("DESYNC")
+        return False
+    print("in sync")
+    return True
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.05
+    loss = float(sys.argv[2]) / 100 if len(sys.argv) > 2 else 0.05
+    input_delay = int(sys.argv[3]) if len(sys.argv) > 3 else netplay.INPUT_DELAY
+    bench_costs()
+    print(f"localhost match, {latency * 1000:.0f} ms latency, {loss * 100:.0f}% loss, "
+          f"{input_delay} frames input delay:")
+    sys.exit(0 if asyncio.run(run_pair(latency, loss, input_delay)) else 1)
@@ -0,0 +1,82 @@
+import sys
+import time
+
+import common
+
+from stickman import sim
+from stickman.search import DIFFICULTY, HOLD_FRAMES, Search, SearchWorker
+
+# Search AI: decisions per second and budget overruns at each difficulty,
+# how the search side does against the built-in random AI, and the frame
+# cost of polling a worker from the game loop.
+# Usage: python benchmarks/bench_search.py [matches per level]
+
+def fight_states(count=50):
+    # Mid-fight positions to decide from, players in reach of each other
+    match = sim.Match(seed=3)
+    match.player1.is_ai = True
+    match.player1.x = match.player1.target_x = 360
+    match.player2.x = match.player2.target_x = 420
+    states = []
+    for _ in range(count):
+        match.run(7)
+        states.append(match.save_state())
+    return states
+
+def decisions(level, states):
+    search = Search.for_level(1, level, seed=0)
+    budget = search.budget
+    worst = 0
+    start = time.perf_counter()
+    for state in states:
+        begin = time.perf_counter()
+        search.decide(state)
+        worst = max(worst, time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    return len(states) / elapsed, search.rollouts / elapsed, (worst - budget) * 1000
+
+def play(level, seed, frames=900):
+    # Player 2 searches, player 1 is the random AI; one decision per hold
+    match = sim.Match(ai_mode=False, seed=seed)
+    match.player1.is_ai = True
+    search = Search.for_level(1, level, seed=seed)
+    buttons = 0
+    for frame in range(frames):
+        if frame % HOLD_FRAMES == 0:
+            buttons = search.decide(match.save_state())
+        match.step(0, buttons)
+        if match.player1.health <= 0 or match.player2.health <= 0:
+            break
+    return 100 - match.player1.health, 100 - match.player2.health
+
+def worker_poll_cost(frames=600):
+    match = sim.Match(ai_mode=False, seed=0)
+    worker = SearchWorker(1, "normal", seed=0)
+    worst = total = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        buttons = worker.poll(match)
+        cost = time.perf_counter() - start
+        total += cost
+        worst = max(worst, cost)
+        match.step(0, buttons)
+        time.sleep(1.0 / sim.FPS)
+    worker.close()
+    return total / frames * 1e6, worst * 1e6, worker.decisions
+
+if __name__ == "__main__":
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    states = fight_states()
+    for level, (budget_ms, depth) in DIFFICULTY.items():
+        rate, rollouts, overrun = decisions(level, states)
+        dealt = taken = 0
+        for seed in range(matches):
+            d, t = play(level, seed)
+            dealt += d
+            taken += t
+        print(f"{level:7} {budget_ms:3} ms, {depth:2} frames: {rate:6.0f} decisions/s, "
+              f"{rollouts:7,.0f} rollouts/s, worst overrun {overrun:5.2f} ms, "
+              f"vs random AI dealt {dealt} / took {taken} over {matches} matches")
+    mean, worst, count = worker_poll_cost()
+    print(f"worker poll: {mean:.1f} us mean, {worst:.1f} us worst per frame, "
+          f"{count} decisions in 600 frames")
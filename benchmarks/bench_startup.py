@@ -0,0 +1,61 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import common
+
+# Startup time, from starting the process to the first presented frame, for
+# each version through the launcher. Then what goes into it: a bare
+# interpreter, importing pygame (most of it is pygame pulling in numpy and
+# pkg_resources), importing a game script (which no longer starts pygame or
+# opens a window), and pygame.init() against starting only the display and
+# fonts. Each measurement is a fresh process, median of a few runs.
+# Headless here, so window creation is cheaper than on a real display.
+# Usage: python benchmarks/bench_startup.py [runs]
+
+EAGER = ("import pygame; pygame.init(); pygame.display.set_mode((800, 600)); "
+         "pygame.display.flip(); print('first frame', flush=True)")
+MINIMAL = ("import pygame; pygame.display.init(); pygame.font.init(); "
+           "pygame.display.set_mode((800, 600)); pygame.display.flip(); "
+           "print('first frame', flush=True)")
+BARE = "print('first frame', flush=True)"
+PYGAME = "import pygame; print('first frame', flush=True)"
+IMPORT = ("from stickman import launcher; launcher.load({version!r}); "
+          "print('first frame', flush=True)")
+
+def time_to_line(args):
+    # Seconds from spawning the process to it printing "first frame"
+    start = time.perf_counter()
+    process = subprocess.Popen(args, cwd=common.ROOT, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.strip() == "first frame":
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        raise RuntimeError(f"{args} exited without presenting a frame")
+    process.stdout.read()
+    process.wait()
+    return elapsed
+
+def median_ms(args, runs):
+    return statistics.median(time_to_line(args) for _ in range(runs)) * 1000
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    python = sys.executable
+    print(f"process start to first frame, median of {runs}:")
+    for version in common.launcher.VERSIONS:
+        ms = median_ms([python, "-m", "stickman.launcher", version, "--startup-check"], runs)
+        print(f"  launcher {version}:                  {ms:7.1f} ms")
+    print("of which:")
+    print(f"  bare interpreter:             {median_ms([python, '-c', BARE], runs):7.1f} ms")
+    print(f"  import pygame:                {median_ms([python, '-c', PYGAME], runs):7.1f} ms")
+    for version in common.launcher.VERSIONS:
+        ms = median_ms([python, "-c", IMPORT.format(version=version)], runs)
+        print(f"  import {version}, no window:        {ms:7.1f} ms")
+    print(f"  pygame.init() + window:       {median_ms([python, '-c', EAGER], runs):7.1f} ms")
+    print(f"  display + font only + window: {median_ms([python, '-c', MINIMAL], runs):7.1f} ms")
+    if os.environ.get("SDL_VIDEODRIVER") == "dummy":
+        print("(dummy video driver: no real window was opened)")
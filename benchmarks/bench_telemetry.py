@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import common
+
+from stickman import sim, telemetry
+from stickman.scheduler import percentile
+
+# Frame time with telemetry off and on: duels at close range between random
+# held inputs and the built-in AI (lots of hits, state changes and AI
+# decisions), each sim step timed on its own while the writer thread
+# compresses and writes in the background. Small blocks make the writer
+# wake up often. Also checks that every file write happened on the writer
+# thread and that the report counts the same hits as the sim.
+# Usage: python benchmarks/bench_telemetry.py [frames per match] [matches]
+
+def duel(seed):
+    match = sim.Match(seed=seed)
+    match.player1.x = match.player1.target_x = 360
+    match.player2.x = match.player2.target_x = 420
+    return match
+
+def held_inputs(frames, seed):
+    # Random buttons for player 1, held 8 frames at a time
+    rng = random.Random(seed)
+    return [rng.randrange(16) for _ in range(frames // 8 + 1)]
+
+def run(frames, matches, recorder=None):
+    times = []
+    hits = 0
+    for seed in range(matches):
+        match = duel(seed)
+        if recorder is not None:
+            match.telemetry = recorder
+            recorder.start_match(match)
+        inputs = held_inputs(frames, seed)
+        step = match.step
+        clock = time.perf_counter
+        for frame in range(frames):
+            buttons = inputs[frame >> 3]
+            start = clock()
+            events = step(buttons)
+            times.append(clock() - start)
+            hits += len(events)
+        if recorder is not None:
+            recorder.end_match(match)
+    times.sort()
+    return times, hits
+
+def describe(label, times):
+    return (f"{label:<14} mean {sum(times) / len(times) * 1e6:6.2f} us, "
+            f"p50 {percentile(times, 50) * 1e6:6.2f} us, p99 {percentile(times, 99) * 1e6:6.2f} us, "
+            f"max {times[-1] * 1e6:8.2f} us")
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 36_000
+    matches = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    path = os.path.join(tempfile.mkdtemp(), "bench.stkt")
+
+    off, hits_off = run(frames, matches)
+    recorder = telemetry.Telemetry(path, block_events=512)
+    # Any write from the game thread would be file I/O in the frame loop
+    write = recorder.file.write
+    game_thread = threading.current_thread()
+    writes_in_loop = [0]
+
+    def checked_write(data):
+        writes_in_loop[0] += threading.current_thread() is game_thread
+        return write(data)
+    recorder.file.write = checked_write
+    on, hits_on = run(frames, matches, recorder)
+    recorder.close()
+
+    print(f"{matches} matches x {frames} frames, {hits_on} hits")
+    print(describe("telemetry off", off))
+    print(describe("telemetry on", on))
+    overhead = sum(on) / len(on) - sum(off) / len(off)
+    print(f"overhead {overhead * 1e6:.2f} us per frame, "
+          f"{overhead * sim.FPS * 100:.4f}% of a 60 Hz frame budget")
+    print(f"{recorder.events} events, {recorder.dropped} dropped, "
+          f"{os.path.getsize(path):,} bytes written, {writes_in_loop[0]} writes from the frame loop")
+    report = telemetry.summarize(path)
+    reported = sum(sum(match["hits"]) for match in report)
+    print(telemetry.format_match(1, report[0]))
+    sys.exit(0 if writes_in_loop[0] == 0 and reported == hits_on == hits_off else 1)
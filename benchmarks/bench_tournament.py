@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import common
+
+from stickman import sim, tournament
+
+# Self-play throughput against worker count, to check the pool scales with
+# cores. The same games are played at every size and have to score the same.
+# Usage: python benchmarks/bench_tournament.py [games]
+
+def run(workers, jobs):
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        scores = pool.map(tournament.play_game, jobs, chunksize=4)
+    return scores, time.perf_counter() - start
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rng = random.Random(0)
+    pool = [sim.DEFAULT_AI] + [tournament.random_params(rng) for _ in range(7)]
+    jobs = [(seed, rng.choice(pool), rng.choice(pool), tournament.MAX_FRAMES)
+            for seed in range(games)]
+    sizes = [1]
+    while sizes[-1] * 2 <= os.cpu_count():
+        sizes.append(sizes[-1] * 2)
+    if sizes[-1] != os.cpu_count():
+        sizes.append(os.cpu_count())
+    baseline = None
+    expected = None
+    for workers in sizes:
+        scores, elapsed = run(workers, jobs)
+        assert expected is None or scores == expected, "results depend on worker count"
+        expected = scores
+        rate = games / elapsed
+        baseline = baseline or rate
+        print(f"{workers:3} workers: {rate:8,.0f} games/s, speedup {rate / baseline:5.2f}x, "
+              f"efficiency {rate / baseline / workers * 100:5.1f}%")
@@ -0,0 +1,20 @@
+import os
+import sys
+
+# Shared helpers for the benchmark scripts. They run headless by default.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from stickman import launcher
+
+def load_game(version="V3", window=True):
+    # Benchmarks draw straight to game.screen, so open the window unless asked not to
+    module = launcher.load(version)
+    if window:
+        module.open_window()
+    return module
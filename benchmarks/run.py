@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+
+import common
+
+import pygame
+
+from stickman import sim
+from stickman.poses import draw_stickman
+
+# Headless benchmark suite. Every benchmark returns {metric: value}; the
+# results go to JSON and can be compared against an earlier run.
+# Usage: python benchmarks/run.py [--json out.json] [--compare old.json] [-k name]
+
+BENCHMARKS = []
+
+def benchmark(fn):
+    BENCHMARKS.append(fn)
+    return fn
+
+def best_rate(fn, count, repeat=3):
+    # Calls per second of fn() over `count` calls, best of `repeat` runs
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+def fighting_players():
+    # Two players mid-fight, with both attacks out
+    player1, player2 = sim.default_players(False, random.Random(0))
+    player1.x = player1.target_x = 560
+    player1.punch()
+    player2.kick()
+    player1.animation_frame = player2.animation_frame = 20
+    return player1, player2
+
+class ScriptedKeys:
+    # Stand-in for pygame.key.get_pressed(): random key combinations, held a few
+    # frames. Changes are also posted as KEYDOWN/KEYUP for event-driven input.
+    def __init__(self, controls, seed=0):
+        self.keys = [key for c in controls for key in c.values()]
+        self.rng = random.Random(seed)
+        self.frames = 0
+        self.pressed = set()
+
+    def advance(self):
+        # Called once per presented frame
+        if self.frames % 8 == 0:
+            pressed = {key for key in self.keys if self.rng.random() < 0.3}
+            for key in pressed - self.pressed:
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+            for key in self.pressed - pressed:
+                pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key))
+            self.pressed = pressed
+        self.frames += 1
+
+    def __call__(self):
+        return self
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+@benchmark
+def player_update():
+    player1, player2 = fighting_players()
+
+    def update():
+        player1.update()
+        if player1.state == sim.IDLE:
+            player1.punch()
+    return {"updates_per_s": best_rate(update, 100_000)}
+
+@benchmark
+def player_get_hitbox():
+    player1, player2 = fighting_players()
+    return {"hitboxes_per_s": best_rate(player1.get_hitbox, 100_000),
+            "body_hitboxes_per_s": best_rate(player1.get_body_hitbox, 100_000)}
+
+@benchmark
+def hit_resolution():
+    player1, player2 = fighting_players()
+    state1, state2 = player1.save_state(), player2.save_state()
+
+    def resolve():
+        player1.load_state(state1)
+        player2.load_state(state2)
+        sim.resolve_hit(player1, player2)
+        sim.resolve_hit(player2, player1)
+    return {"resolutions_per_s": best_rate(resolve, 50_000)}
+
+@benchmark
+def player_draw():
+    game = common.load_game("V3")
+    screen = pygame.Surface((sim.WIDTH, sim.HEIGHT))
+    player = game.Player(400, sim.HEIGHT - 60, (255, 0, 0), {}, rng=random.Random(0))
+    results = {}
+    for state, frame in ((sim.IDLE, 0), (sim.PUNCHING, 8), (sim.PUNCHING, 28),
+                         (sim.KICKING, 8), (sim.KICKING, 28)):
+        player.state, player.animation_frame = state, frame
+        name = f"{sim.STATE_NAMES[state]}_{frame}"
+        results[f"{name}_cached_per_s"] = best_rate(lambda: player.draw(screen), 20_000)
+        results[f"{name}_direct_per_s"] = best_rate(
+            lambda: draw_stickman(screen, player.color, player.x, player.y, state, frame, 1), 20_000)
+    return results
+
+@benchmark
+def menu_draw():
+    game = common.load_game("V3")
+    screen = pygame.Surface((sim.WIDTH, sim.HEIGHT))
+    results = {}
+    for panel in ("update", "main", "settings"):
+        for label, frame in (("animating", 10), ("settled", 25)):
+            menu = game.Menu()
+            menu.update_active = panel == "update"
+            menu.main_active = panel == "main"
+            menu.settings_active = panel == "settings"
+            menu.animation_frame = frame - 0.5
+            menu.update()
+            results[f"{panel}_{label}_per_s"] = best_rate(lambda: menu.draw(screen), 2_000)
+    return results
+
+async def no_sleep(delay):
+    await asyncio.sleep(0)
+
+# Fake time per loop iteration for V3: a hair over one sim step, so float
+# rounding never leaves the scheduler's accumulator one step short
+FAKE_STEP = (1 + 1e-9) / sim.FPS
+
+class NoClock:
+    def tick(self, fps=0):
+        return 0
+
+def run_frames(game, frames, args=()):
+    # Runs the game's own update_loop for `frames` loop iterations with scripted keys
+    # and no frame waiting, returns frames per second. V1 and V2 present once
+    # an iteration; V3's DirtyRenderer skips presenting frames where nothing
+    # changed, so there an iteration is a scheduler steps() call, which also
+    # moves the fake clock on exactly one sim step
+    count = [0]
+    flip, update, get_pressed = pygame.display.flip, pygame.display.update, pygame.key.get_pressed
+    keys = ScriptedKeys([game.player1.controls, game.player2.controls])
+    scheduler_cls = getattr(game, "FrameScheduler", None)
+
+    def next_frame():
+        count[0] += 1
+        keys.advance()
+        if count[0] == frames:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    def present(*rects):
+        if scheduler_cls is None:
+            next_frame()
+        return update(*rects) if rects else flip()
+
+    if scheduler_cls is not None:
+        # Scheduler and input layer share a clock that only steps() moves on
+        fake_time = [0]
+
+        def clock():
+            return fake_time[0] * FAKE_STEP
+
+        class OneStepScheduler(scheduler_cls):
+            def steps(self):
+                fake_time[0] += 1
+                next_frame()
+                due = super().steps()
+                assert due == 1, f"{due} sim steps in one frame"
+                return due
+        game.FrameScheduler = lambda **kw: OneStepScheduler(clock=clock, **kw)
+        game.inputs.clock = clock
+    pygame.display.flip = pygame.display.update = present
+    pygame.key.get_pressed = keys
+    try:
+        start = time.perf_counter()
+        if hasattr(game, "parse_args"):
+            asyncio.run(game.update_loop(game.parse_args(list(args))))
+        else:
+            asyncio.run(game.update_loop())
+        return count[0] / (time.perf_counter() - start)
+    finally:
+        pygame.display.flip, pygame.display.update = flip, update
+        pygame.key.get_pressed = get_pressed
+
+def check_input(game):
+    # Input is stamped by the same fake clock the scheduler runs on, or no
+    # step would ever be due to take it and the fight would go unplayed
+    report = game.inputs.report()
+    assert report["presses"] > 0 and report["dropped"] == 0, game.inputs.summary()
+
+@benchmark
+def full_frame():
+    results = {}
+    for version in ("V1", "V2", "V3"):
+        game = common.load_game(version)
+        if hasattr(game, "clock"):
+            game.clock = NoClock()
+            game.asyncio = type("asyncio", (), {"sleep": staticmethod(no_sleep), "run": asyncio.run})
+        if version == "V2":
+            game.menu.active = False
+        if version == "V3":
+            game.menu.update_active = False
+            game.player1.x = game.player1.target_x = 500
+            results["V3_full_redraw_fps"] = run_frames(game, 2_000, ["--render-rate", "uncapped",
+                                                                     "--full-redraw"])
+            check_input(game)
+            game = common.load_game(version)
+            game.menu.update_active = False
+            game.player1.x = game.player1.target_x = 500
+            results["V3_fps"] = run_frames(game, 2_000, ["--render-rate", "uncapped"])
+            check_input(game)
+        else:
+            results[f"{version}_fps"] = run_frames(game, 2_000)
+    return results
+
+def compare(results, baseline, threshold):
+    # Every metric is "higher is better"; report drops beyond the threshold
+    regressions = []
+    for name, metrics in results["benchmarks"].items():
+        for metric, value in metrics.items():
+            old = baseline.get("benchmarks", {}).get(name, {}).get(metric)
+            if old and value < old * (1 - threshold):
+                regressions.append(f"{name}.{metric}: {old:,.0f} -> {value:,.0f} "
+                                   f"({(value / old - 1) * 100:+.1f}%)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless stickman benchmarks")
+    parser.add_argument("--json", metavar="FILE", help="write results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="flag regressions against an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown counted as a regression (default 0.15)")
+    parser.add_argument("-k", dest="only", action="append", help="only run benchmarks with this name")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    results = {
+        "python": sys.version.split()[0],
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": {},
+    }
+    for fn in BENCHMARKS:
+        if args.only and fn.__name__ not in args.only:
+            continue
+        metrics = fn()
+        results["benchmarks"][fn.__name__] = metrics
+        for metric, value in metrics.items():
+            print(f"{fn.__name__:<18} {metric:<32} {value:>14,.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Shared game code for the stickman fighting game (used by V3 and tools)
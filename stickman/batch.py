@@ -0,0 +1,194 @@
+import numpy as np
+
+from stickman import sim
+
+# Batched version of sim.Match: N two-player matches stored as
+# structure-of-arrays, shape (N, 2), all advanced by one step() call.
+# Input-driven steps follow Player.update, Player.get_hitbox and
+# sim.resolve_hit exactly; the AI uses numpy's RNG so it only matches
+# Player.ai_move in distribution, not draw for draw.
+from stickman.sim import IDLE, HIT
+
+# Damage and knockback by attacker state code
+DAMAGE = np.array(sim.ATTACK_DAMAGE)
+KNOCKBACK = np.array(sim.KNOCKBACK)
+STATE_FRAMES = np.array(sim.STATE_FRAMES)
+HIT_PULL = np.array(sim.HIT_PULL)
+
+def hitbox_table(column):
+    # sim.HITBOXES as one (state, frame) array; inactive frames get NaN
+    table = np.full((len(sim.HITBOXES), max(sim.STATE_FRAMES)), np.nan)
+    for state, boxes in enumerate(sim.HITBOXES):
+        for frame, box in enumerate(boxes):
+            if box is not None:
+                table[state, frame] = box[column]
+    return table
+
+HITBOX_X, HITBOX_Y, HITBOX_WIDTH, HITBOX_HEIGHT = (hitbox_table(i) for i in range(4))
+
+WIDTH_PX = 20
+HEIGHT_PX = 40
+HEAD_RADIUS = 10
+
+class BatchMatch:
+    def __init__(self, n, x1=200, x2=600, y=sim.HEIGHT - 60, ai=(False, False), seed=None):
+        self.n = n
+        self.start_x = (x1, x2)
+        self.x = np.empty((n, 2))
+        self.x[:, 0] = x1
+        self.x[:, 1] = x2
+        self.y = np.full((n, 2), y, dtype=np.int64)
+        self.facing = np.where(self.x < sim.WIDTH // 2, 1, -1).astype(np.int64)
+        self.state = np.zeros((n, 2), dtype=np.int8)
+        self.animation_frame = np.zeros((n, 2), dtype=np.int64)
+        self.health = np.full((n, 2), 100, dtype=np.int64)
+        self.hit_cooldown = np.zeros((n, 2), dtype=np.int64)
+        self.target_x = self.x.copy()
+        self.ai = tuple(ai)
+        self.rng = np.random.default_rng(seed)
+        self.ai_action_timer = np.zeros((n, 2), dtype=np.int64)
+        self.ai_action_duration = self.rng.integers(30, 61, size=(n, 2))
+        self.frame = 0
+
+    def reset(self, rows):
+        # Start the matches picked by rows (bool mask or indices) over
+        self.x[rows] = self.start_x
+        self.target_x[rows] = self.x[rows]
+        self.facing[rows] = np.where(self.x[rows] < sim.WIDTH // 2, 1, -1)
+        self.state[rows] = IDLE
+        self.animation_frame[rows] = 0
+        self.health[rows] = 100
+        self.hit_cooldown[rows] = 0
+        self.ai_action_timer[rows] = 0
+        self.ai_action_duration[rows] = self.rng.integers(30, 61, size=self.x[rows].shape)
+
+    @classmethod
+    def from_players(cls, pairs):
+        # Build a batch from existing (player1, player2) pairs, e.g. sim.Match.players
+        batch = cls(len(pairs), y=0)
+        for i, pair in enumerate(pairs):
+            for j, player in enumerate(pair):
+                batch.x[i, j] = player.x
+                batch.y[i, j] = player.y
+                batch.facing[i, j] = player.facing
+                batch.state[i, j] = player.state
+                batch.animation_frame[i, j] = player.animation_frame
+                batch.health[i, j] = player.health
+                batch.hit_cooldown[i, j] = player.hit_cooldown
+                batch.target_x[i, j] = player.target_x
+        batch.ai = (pairs[0][0].is_ai, pairs[0][1].is_ai) if pairs else (False, False)
+        return batch
+
+    def _handle_input(self, j, buttons):
+        x = self.x[:, j]
+        movable = self.state[:, j] == IDLE
+        left = movable & (buttons & sim.LEFT != 0)
+        right = movable & (buttons & sim.RIGHT != 0)
+        x -= 5 * left
+        self.facing[:, j][left] = -1
+        x += 5 * right
+        self.facing[:, j][right] = 1
+        np.clip(x, HEAD_RADIUS, sim.WIDTH - HEAD_RADIUS, out=x, where=movable)
+        self.target_x[:, j][movable] = x[movable]
+        for code, button in sim.MOVE_BUTTONS:
+            self._start_move(j, code, buttons & button != 0)
+
+    def _start_move(self, j, code, pressed):
+        state = self.state[:, j]
+        start = pressed & (state == IDLE)
+        state[start] = code
+        self.animation_frame[:, j][start] = 0
+
+    def _ai_move(self, j):
+        state = self.state[:, j]
+        thinking = state == IDLE
+        timer = self.ai_action_timer[:, j]
+        timer += thinking
+        act = thinking & (timer >= self.ai_action_duration[:, j])
+        count = int(act.sum())
+        if not count:
+            return
+        timer[act] = 0
+        self.ai_action_duration[:, j][act] = self.rng.integers(30, 61, size=count)
+        action = np.zeros(self.n, dtype=np.int8)
+        action[act] = self.rng.integers(0, 3, size=count)
+
+        x = self.x[:, j]
+        moving = act & (action == 0)
+        distance = self.x[:, 1 - j] - x
+        step = np.where(distance > 0, 5, -5)
+        approach = moving & (np.abs(distance) > 100)
+        retreat = moving & ~approach & (np.abs(distance) < 50)
+        x += step * approach
+        self.facing[:, j][approach] = step[approach] // 5
+        x -= step * retreat
+        np.clip(x, HEAD_RADIUS, sim.WIDTH - HEAD_RADIUS, out=x, where=moving)
+        self.target_x[:, j][moving] = x[moving]
+        self._start_move(j, sim.PUNCHING, act & (action == 1))
+        self._start_move(j, sim.KICKING, act & (action == 2))
+
+    def get_hitbox(self, j):
+        # Returns (active, left, top, width, height) of the attack rect for column j
+        state = self.state[:, j]
+        frame = self.animation_frame[:, j]
+        x = HITBOX_X[state, frame]
+        active = ~np.isnan(x)
+        left = np.trunc(self.x[:, j] + self.facing[:, j] * x)
+        top = self.y[:, j] + HITBOX_Y[state, frame]
+        return active, left, top, HITBOX_WIDTH[state, frame], HITBOX_HEIGHT[state, frame]
+
+    def get_body_hitbox(self, j):
+        left = np.trunc(self.x[:, j] - WIDTH_PX // 2)
+        top = self.y[:, j] - HEAD_RADIUS
+        return left, top
+
+    def _resolve_hits(self, a, d, damage_taken):
+        active, hit_left, hit_top, hit_width, hit_height = self.get_hitbox(a)
+        body_left, body_top = self.get_body_hitbox(d)
+        overlap = (active
+                   & (hit_left < body_left + WIDTH_PX) & (body_left < hit_left + hit_width)
+                   & (hit_top < body_top + HEIGHT_PX + HEAD_RADIUS) & (body_top < hit_top + hit_height))
+        hit = overlap & (self.hit_cooldown[:, d] == 0) & (self.state[:, d] != HIT)
+        if not hit.any():
+            return
+        damage = DAMAGE[self.state[:, a]] * hit
+        self.state[:, d][hit] = HIT
+        self.animation_frame[:, d][hit] = 0
+        self.health[:, d] -= damage
+        damage_taken[:, d] += damage
+        self.hit_cooldown[:, d][hit] = sim.HIT_COOLDOWN
+        knockback = KNOCKBACK[self.state[:, a]]
+        self.target_x[:, d][hit] = (self.x[:, d] - knockback * self.facing[:, d])[hit]
+
+    def _update(self):
+        state = self.state
+        frame = self.animation_frame
+        busy = state != IDLE
+        frame += busy
+        hit = state == HIT
+        if hit.any():
+            t = HIT_PULL[np.where(hit, frame, 0)]
+            self.x[hit] = (self.x + (self.target_x - self.x) * t)[hit]
+        done = busy & (frame >= STATE_FRAMES[state])
+        state[done] = IDLE
+        frame[done] = 0
+        np.subtract(self.hit_cooldown, 1, out=self.hit_cooldown, where=self.hit_cooldown > 0)
+
+    def step(self, inputs=None):
+        # inputs: int array (N, 2) of sim.LEFT/RIGHT/PUNCH/KICK bits, ignored for AI columns.
+        # Returns the damage each player took this frame, shape (N, 2).
+        if inputs is None:
+            inputs = np.zeros((self.n, 2), dtype=np.int64)
+        for j in range(2):
+            if self.ai[j]:
+                self._ai_move(j)
+            else:
+                self._handle_input(j, inputs[:, j])
+
+        damage_taken = np.zeros((self.n, 2), dtype=np.int64)
+        self._resolve_hits(0, 1, damage_taken)
+        self._resolve_hits(1, 0, damage_taken)
+
+        self._update()
+        self.frame += 1
+        return damage_taken
@@ -0,0 +1,111 @@
+import random
+from bisect import bisect_left, bisect_right
+
+from stickman import sim
+from stickman.profiler import NULL_PROFILER
+
+# Free-for-all with any number of fighters. Hit resolution keeps the
+# two-player rules (sim.resolve_hit, attackers in order) but finds the
+# candidates with a sweep over body boxes sorted by x instead of testing
+# every pair.
+
+# Bodies are all this wide, so a body overlaps a hitbox only if its left
+# edge is within this distance to the left of the hitbox's right edge
+BODY_WIDTH = 20
+
+class Brawl:
+    def __init__(self, fighters, seed=None, broad_phase=True, remove_knocked_out=True):
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.rng = sim.AIRandom(seed)
+        for fighter in fighters:
+            fighter.rng = self.rng
+        self.fighters = list(fighters)
+        self.broad_phase = broad_phase
+        self.remove_knocked_out = remove_knocked_out
+        self.frame = 0
+        self.profiler = NULL_PROFILER
+        self.checks = 0  # Exact rect tests done, for comparing broad phases
+
+    @classmethod
+    def spawn(cls, count, humans=1, seed=None, player_cls=sim.Player, **options):
+        # count fighters spread over the stage; the first `humans` use player 1's controls
+        rng = random.Random(seed)
+        player1, player2 = sim.default_players(False, rng, player_cls)
+        fighters = [player1] if humans else []
+        for i in range(len(fighters), count):
+            x = rng.uniform(20, sim.WIDTH - 20)
+            color = (rng.randrange(40, 220), rng.randrange(40, 220), rng.randrange(40, 220))
+            fighter = player_cls(x, sim.HEIGHT - 60, color, player2.controls, is_ai=True, rng=rng)
+            fighters.append(fighter)
+        return cls(fighters, seed=seed, **options)
+
+    def nearest_opponents(self, order):
+        # Nearest other fighter by x for each fighter, from the x-sorted order
+        nearest = {}
+        for i, fighter in enumerate(order):
+            left = order[i - 1] if i > 0 else None
+            right = order[i + 1] if i + 1 < len(order) else None
+            if left is None or (right is not None and right.x - fighter.x < fighter.x - left.x):
+                nearest[fighter] = right
+            else:
+                nearest[fighter] = left
+        return nearest
+
+    def step(self, inputs=None):
+        # inputs: {fighter index: buttons} for the human fighters
+        fighters = self.fighters
+        for fighter in fighters:
+            fighter.prev_x = fighter.x
+        order = sorted(fighters, key=lambda f: f.x)
+        nearest = self.nearest_opponents(order)
+        for i, fighter in enumerate(fighters):
+            if fighter.is_ai:
+                opponent = nearest[fighter]
+                if opponent is not None:
+                    fighter.ai_move(opponent)
+            elif inputs:
+                fighter.handle_input(inputs.get(i, 0))
+        self.profiler.lap("input")
+
+        events = self.resolve_hits()
+        self.profiler.lap("collision")
+
+        for fighter in fighters:
+            fighter.update()
+        if self.remove_knocked_out:
+            self.fighters = [f for f in fighters if f.health > 0]
+        self.profiler.lap("update")
+        self.frame += 1
+        return events
+
+    def resolve_hits(self):
+        fighters = self.fighters
+        index = {id(f): i for i, f in enumerate(fighters)}
+        events = []
+        bodies = None
+        for attacker in fighters:
+            hitbox = attacker.get_hitbox()
+            if not hitbox:
+                continue
+            if self.broad_phase:
+                if bodies is None:
+                    # Body boxes don't move during resolution (knockback only sets target_x)
+                    bodies = sorted(((f.get_body_hitbox(), f) for f in fighters),
+                                    key=lambda b: b[0].left)
+                    lefts = [body.left for body, f in bodies]
+                lo = bisect_right(lefts, hitbox.left - BODY_WIDTH)
+                hi = bisect_left(lefts, hitbox.right)
+                candidates = sorted((f for body, f in bodies[lo:hi]), key=lambda f: index[id(f)])
+            else:
+                candidates = fighters
+            for defender in candidates:
+                if defender is attacker:
+                    continue
+                self.checks += 1
+                hit = sim.resolve_hit(attacker, defender)
+                if hit:
+                    events.append(sim.HitEvent(self.frame, index[id(attacker)], index[id(defender)],
+                                               *hit))
+        return events
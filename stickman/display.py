@@ -0,0 +1,51 @@
+import pygame
+
+# Lazy pygame startup. pygame.init() brings up every SDL subsystem (audio,
+# joystick, ...) whether the game uses it or not, and the scripts used to
+# open their window at import. Now nothing starts until the window opens for
+# the first frame, then only the display and fonts: nothing plays sound.
+#
+# The window is SCALED: the game always draws to a fixed-size canvas (the
+# display surface) and SDL's renderer stretches it to the window on the GPU,
+# letterboxed, and maps mouse positions back to canvas coordinates. Going
+# fullscreen is desktop fullscreen on the same window, so the monitor mode
+# never changes and the canvas, with everything cached against it, survives.
+# The headless drivers have no renderer to scale with and get a plain window.
+
+HEADLESS_DRIVERS = ("dummy", "offscreen")
+
+def scaled_flag():
+    return 0 if pygame.display.get_driver() in HEADLESS_DRIVERS else pygame.SCALED
+
+def open_window(size, caption, flags=0, vsync=False):
+    pygame.display.init()
+    pygame.font.init()
+    flags |= scaled_flag()
+    screen = None
+    if vsync:
+        try:
+            screen = pygame.display.set_mode(size, flags, vsync=1)
+        except pygame.error:
+            pass  # No vsync on this renderer, present unsynced
+    if screen is None:
+        screen = pygame.display.set_mode(size, flags)
+    pygame.display.set_caption(caption)
+    return screen
+
+def toggle_fullscreen(size):
+    # Returns the canvas, which is the same surface unless SDL had to
+    # rebuild the window (no renderer, e.g. the dummy video driver)
+    try:
+        pygame.display.toggle_fullscreen()
+    except pygame.error:
+        flags = scaled_flag()
+        if not pygame.display.is_fullscreen():
+            flags |= pygame.FULLSCREEN
+        pygame.display.set_mode(size, flags)
+    return pygame.display.get_surface()
+
+def set_fullscreen(size, fullscreen):
+    # Into or out of desktop fullscreen, nothing if already there
+    if pygame.display.is_fullscreen() != fullscreen:
+        return toggle_fullscreen(size)
+    return pygame.display.get_surface()
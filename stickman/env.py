@@ -0,0 +1,107 @@
+import random
+
+import numpy as np
+
+from stickman import sim
+from stickman.batch import BatchMatch
+
+# Reset/step environments for training agents, with the gymnasium calling
+# conventions (reset -> obs, info; step -> obs, reward, terminated,
+# truncated, info) but no dependency on it. The agent plays player 1
+# against the built-in AI, or against a fighter that stands still
+# (opponent="none"). FighterEnv wraps sim.Match; VectorEnv steps N games
+# per call on BatchMatch with no pygame involved. VectorEnv's built-in AI
+# draws from numpy's RNG, so it plays like FighterEnv's but not move for move.
+
+# Discrete actions: idle, left, right, punch, kick
+ACTIONS = (0, sim.LEFT, sim.RIGHT, sim.PUNCH, sim.KICK)
+ACTION_BUTTONS = np.array(ACTIONS)
+MAX_FRAMES = 60 * sim.FPS
+
+# Observation per fighter: x, facing, health, hit cooldown, progress through
+# the current state, then the state one-hot; agent first, opponent second,
+# then the gap between them. Positions are in screen widths, the rest 0..1.
+PLAYER_FEATURES = 5 + len(sim.STATE_NAMES)
+OBS_SIZE = 2 * PLAYER_FEATURES + 1
+STATE_FRAMES = np.array(sim.STATE_FRAMES)
+ONE_HOT = np.eye(len(sim.STATE_NAMES))
+
+def observe(me, them):
+    obs = np.empty(OBS_SIZE, dtype=np.float32)
+    for base, player in ((0, me), (PLAYER_FEATURES, them)):
+        obs[base:base + 5] = (player.x / sim.WIDTH, player.facing, player.health / 100,
+                              player.hit_cooldown / sim.HIT_COOLDOWN,
+                              player.animation_frame / sim.STATE_FRAMES[player.state])
+        obs[base + 5:base + PLAYER_FEATURES] = ONE_HOT[player.state]
+    obs[-1] = (them.x - me.x) / sim.WIDTH
+    return obs
+
+class FighterEnv:
+    def __init__(self, opponent="ai", max_frames=MAX_FRAMES, seed=None):
+        self.opponent = opponent
+        self.max_frames = max_frames
+        self.rng = random.Random(seed)
+        self.match = None
+
+    def reset(self, seed=None):
+        if seed is None:
+            seed = self.rng.randrange(2 ** 63)
+        self.match = sim.Match(ai_mode=self.opponent == "ai", seed=seed)
+        return observe(*self.match.players), {}
+
+    def step(self, action):
+        match = self.match
+        me, them = match.players
+        before = me.health - them.health
+        events = match.step(ACTIONS[action], 0)
+        reward = (me.health - them.health - before) / 100
+        terminated = me.health <= 0 or them.health <= 0
+        truncated = not terminated and match.frame >= self.max_frames
+        return observe(me, them), reward, terminated, truncated, {"events": events}
+
+class VectorEnv:
+    # N games in lockstep. Finished games start over inside step(), so the
+    # observation returned for them is already the first of the next game.
+    def __init__(self, n, opponent="ai", max_frames=MAX_FRAMES, seed=None):
+        self.n = n
+        self.max_frames = max_frames
+        self.batch = BatchMatch(n, ai=(False, opponent == "ai"), seed=seed)
+        self.frames = np.zeros(n, dtype=np.int64)
+        self.inputs = np.zeros((n, 2), dtype=np.int64)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.batch.rng = np.random.default_rng(seed)
+        self.batch.reset(slice(None))
+        self.frames[:] = 0
+        return self.observe(), {}
+
+    def observe(self):
+        batch = self.batch
+        obs = np.empty((self.n, OBS_SIZE), dtype=np.float32)
+        for j in range(2):
+            base = j * PLAYER_FEATURES
+            state = batch.state[:, j]
+            obs[:, base] = batch.x[:, j] / sim.WIDTH
+            obs[:, base + 1] = batch.facing[:, j]
+            obs[:, base + 2] = batch.health[:, j] / 100
+            obs[:, base + 3] = batch.hit_cooldown[:, j] / sim.HIT_COOLDOWN
+            obs[:, base + 4] = batch.animation_frame[:, j] / STATE_FRAMES[state]
+            obs[:, base + 5:base + PLAYER_FEATURES] = ONE_HOT[state]
+        obs[:, -1] = (batch.x[:, 1] - batch.x[:, 0]) / sim.WIDTH
+        return obs
+
+    def step(self, actions):
+        # actions: int array (n,) of indices into ACTIONS
+        batch = self.batch
+        self.inputs[:, 0] = ACTION_BUTTONS[actions]
+        damage = batch.step(self.inputs)
+        reward = (damage[:, 1] - damage[:, 0]) / 100
+        self.frames += 1
+        terminated = (batch.health <= 0).any(axis=1)
+        truncated = ~terminated & (self.frames >= self.max_frames)
+        done = terminated | truncated
+        if done.any():
+            batch.reset(done)
+            self.frames[done] = 0
+        return self.observe(), reward, terminated, truncated, {}
@@ -0,0 +1,200 @@
+import argparse
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+
+# --raw - writes frames to stdout, where pygame's greeting would end up too
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from stickman import launcher, sim
+from stickman.particles import ParticlePool
+from stickman.replay import ReplayError, ReplayReader, check_chunk
+
+# Offline replay export: re-simulates a recorded match and draws every frame
+# with V3's own fight scene (Player.draw, the health bars) onto an off-screen
+# canvas, no window or display needed. The main process plays the replay
+# once, checking the recorded CRCs, and snapshots the match state and the
+# hit sparks at the start of each range of frames. Ranges are rendered in a process pool, each
+# worker restoring its snapshot and stepping on from there, and come back in
+# order. Output is a PNG per frame or raw RGB24 frames for an encoder:
+#   python -m stickman.export match.stkr --png frames/
+#   python -m stickman.export match.stkr --raw - | ffmpeg -f rawvideo \
+#       -pix_fmt rgb24 -s 800x600 -r 60 -i - match.mp4
+
+CHUNK_FRAMES = 15
+PNG_NAME = "frame_{:06d}.png"
+FRAME_BYTES = sim.WIDTH * sim.HEIGHT * 3  # One raw RGB24 frame
+RGB_MASKS = (0xFF, 0xFF00, 0xFF0000, 0)
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_LEVEL = 1  # Frames are flat colour: level 1 is ~4x faster than pygame's PNGs, a few KB bigger
+
+def plan(path, chunk_frames=CHUNK_FRAMES, verify=True):
+    # Returns [(first frame, state snapshot, sparks state, inputs)] covering the replay
+    jobs = []
+    # Sparks depend on every hit before the range, so they're run here too
+    sparks = ParticlePool(pygame.Color("white"), seed=0)
+    with ReplayReader(path) as reader:
+        match = reader.new_match()
+        step = match.step
+        for inputs, crcs in reader.chunks():
+            start_state = match.save_state()
+            for start in range(0, len(inputs), chunk_frames):
+                snapshot = bytearray(match.snapshot.size)
+                match.pack_into(snapshot)
+                part = inputs[start:start + chunk_frames]
+                jobs.append((match.frame, bytes(snapshot), sparks.save_state(), part))
+                for byte in part:
+                    sparks.update()
+                    sparks.spawn_hits(step(byte & 0xF, byte >> 4))
+            if verify:
+                check_chunk(match, start_state, inputs, crcs)
+    return jobs
+
+# Per-worker state, set up once by init_worker
+worker = None
+
+class FrameRenderer:
+    def __init__(self, path, frames_buffer=None):
+        # The game script only starts pygame when its window opens, so
+        # loading it here just gets its Player and fight scene
+        self.game = launcher.load("V3")
+        with ReplayReader(path) as reader:
+            self.match = reader.new_match(self.game.Player)
+        self.game.match = self.match
+        self.game.player1, self.game.player2 = self.match.players
+        # 24-bit with red in the lowest byte: the pixels in memory are
+        # already RGB24 rows with no padding, so raw output is a plain copy
+        self.canvas = pygame.Surface((self.game.WIDTH, self.game.HEIGHT), 0, 24, RGB_MASKS)
+        self.frames_buffer = None if frames_buffer is None else memoryview(frames_buffer).cast("B")
+
+    def frames(self, snapshot, sparks, inputs):
+        # Steps from the snapshots and yields the canvas after each frame
+        self.match.unpack_from(snapshot)
+        self.game.sparks.load_state(sparks)
+        step = self.match.step
+        game, canvas = self.game, self.canvas
+        for byte in inputs:
+            game.step_effects(step(byte & 0xF, byte >> 4))
+            canvas.fill(game.WHITE)
+            for rect, key, draw in game.fight_items(1.0).values():
+                draw(canvas)
+            yield canvas
+
+def init_worker(path, frames_buffer):
+    global worker
+    worker = FrameRenderer(path, frames_buffer)
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def write_png(canvas, path):
+    # 8-bit RGB, no row filters, straight from the canvas pixels
+    width, height = canvas.get_size()
+    pixels = bytes(canvas.get_view("0"))
+    pitch = width * 3
+    rows = b"".join(b"\0" + pixels[y * pitch:(y + 1) * pitch] for y in range(height))
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(png_chunk(b"IDAT", zlib.compress(rows, PNG_LEVEL)))
+        f.write(png_chunk(b"IEND", b""))
+
+def render_png(job, directory):
+    first, snapshot, sparks, inputs = job
+    for i, canvas in enumerate(worker.frames(snapshot, sparks, inputs)):
+        write_png(canvas, os.path.join(directory, PNG_NAME.format(first + i)))
+    return len(inputs)
+
+def render_raw(job, offset):
+    # Copies the frames into the shared buffer at offset, returns how many
+    first, snapshot, sparks, inputs = job
+    view = worker.frames_buffer
+    for canvas in worker.frames(snapshot, sparks, inputs):
+        view[offset:offset + FRAME_BYTES] = canvas.get_view("0")
+        offset += FRAME_BYTES
+    return len(inputs)
+
+def export(path, png_dir=None, raw=None, workers=None, chunk_frames=CHUNK_FRAMES, verify=True):
+    # Writes PNGs into png_dir or raw frames to the binary file raw, returns the frame count
+    jobs = plan(path, chunk_frames, verify)
+    workers = workers or os.cpu_count()
+    # A few ranges in flight per worker, so the pool stays busy without
+    # rendered frames piling up when the encoder reads slower
+    slots = workers * 2
+    frames_buffer = None
+    if raw is not None:
+        # Raw frames come back through shared memory: pickling 1.4 MB a
+        # frame through the pool's pipe cost more than rendering it
+        slot_bytes = chunk_frames * FRAME_BYTES
+        frames_buffer = multiprocessing.RawArray("B", slot_bytes * slots)
+        view = memoryview(frames_buffer).cast("B")
+    if png_dir is not None:
+        os.makedirs(png_dir, exist_ok=True)
+    frames = 0
+    with multiprocessing.Pool(workers, init_worker, (path, frames_buffer)) as pool:
+        pending = deque()
+        free = deque(range(slots))
+        jobs = iter(jobs)
+        while True:
+            while free:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                slot = free.popleft()
+                if raw is None:
+                    result = pool.apply_async(render_png, (job, png_dir))
+                else:
+                    result = pool.apply_async(render_raw, (job, slot * slot_bytes))
+                pending.append((slot, result))
+            if not pending:
+                break
+            slot, result = pending.popleft()
+            count = result.get()
+            if raw is not None:
+                start = slot * slot_bytes
+                raw.write(view[start:start + count * FRAME_BYTES])
+            frames += count
+            free.append(slot)
+    return frames
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a stickman replay to a video stream or PNGs")
+    parser.add_argument("replay")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--png", metavar="DIR", help="write one PNG per frame into DIR")
+    output.add_argument("--raw", metavar="FILE",
+                        help=f"write raw RGB24 {sim.WIDTH}x{sim.HEIGHT} frames at {sim.FPS} fps "
+                             "to FILE, '-' for stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes to render in (default: one per core)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_FRAMES, metavar="FRAMES",
+                        help=f"frames per range handed to a worker (default {CHUNK_FRAMES})")
+    parser.add_argument("--no-verify", dest="verify", action="store_false",
+                        help="skip the replay's state checks")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    out = None
+    try:
+        if args.raw is not None:
+            out = sys.stdout.buffer if args.raw == "-" else open(args.raw, "wb")
+        frames = export(args.replay, args.png, out, args.workers, args.chunk, args.verify)
+    except (OSError, ReplayError) as e:
+        print(f"{args.replay}: FAILED, {e}", file=sys.stderr)
+        return 1
+    finally:
+        if out is not None and out is not sys.stdout.buffer:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{args.replay}: {frames} frames in {elapsed:.1f} s, "
+          f"{frames / sim.FPS / max(elapsed, 1e-9):.1f}x real time on {args.workers} worker(s)",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import time
+from array import array
+
+import pygame
+
+from stickman import sim
+from stickman.scheduler import percentile
+
+# Event-driven input: KEYDOWN/KEYUP go into a per-player ring buffer with the
+# time they arrived, and each sim step takes what arrived before its
+# scheduled time (FrameScheduler.step_time), so a frame that runs several
+# steps hands each one its own presses.
+# Unlike polling key.get_pressed() once a frame, a tap shorter than a frame
+# still counts, and an attack pressed while the fighter is busy is held for
+# a few frames and fires as soon as it can (press buffering).
+#
+# pygame doesn't expose SDL's event times, so the key events of one pump are
+# spread evenly, in order, over the time since the previous pump. Latency
+# is measured from that time to the present of the first frame that
+# simulated the press.
+
+BUFFER_FRAMES = 8
+MOVE_BITS = tuple(button for _, button in sim.MOVE_BUTTONS)
+
+class InputRing:
+    # Fixed-size ring of (time, button bit, down); when full the oldest goes
+    def __init__(self, size=64):
+        self.size = size
+        self.times = array("d", [0.0] * size)
+        self.buttons = array("B", [0] * size)
+        self.down = array("B", [0] * size)
+        self.head = 0  # Next slot to write
+        self.tail = 0  # Oldest unread
+        self.dropped = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, t, button, down):
+        if self.head - self.tail == self.size:
+            self.tail += 1
+            self.dropped += 1
+        i = self.head % self.size
+        self.times[i] = t
+        self.buttons[i] = button
+        self.down[i] = down
+        self.head += 1
+
+    def pop_until(self, until=None):
+        while self.tail < self.head:
+            i = self.tail % self.size
+            if until is not None and self.times[i] > until:
+                return
+            self.tail += 1
+            yield self.times[i], self.buttons[i], self.down[i]
+
+class InputLayer:
+    def __init__(self, controls, buffer_frames=BUFFER_FRAMES, size=64, history=600,
+                 clock=time.perf_counter):
+        # controls: one Player.controls dict per player
+        self.keymap = {}
+        for index, player_controls in enumerate(controls):
+            for name, key in player_controls.items():
+                self.keymap[key] = (index, sim.BUTTONS[name])
+        self.rings = [InputRing(size) for _ in controls]
+        self.held = [0] * len(controls)
+        self.pending = [{} for _ in controls]  # Buffered attack bit -> frames left
+        self.buffer_frames = buffer_frames
+        self.clock = clock
+        self.last_feed = None
+        self.unpresented = []  # Times of presses simulated but not yet shown
+        # Ring buffer of input-to-present latencies in seconds
+        self.latencies = [0.0] * history
+        self.latency_count = 0
+
+    def feed(self, events, now=None):
+        if now is None:
+            now = self.clock()
+        keys = []
+        for event in events:
+            if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+                target = self.keymap.get(event.key)
+                if target is not None:
+                    keys.append((target, event.type == pygame.KEYDOWN))
+        start = now if self.last_feed is None else min(self.last_feed, now)
+        self.last_feed = now
+        for i, ((index, button), down) in enumerate(keys, 1):
+            self.rings[index].push(start + (now - start) * i / len(keys), button, down)
+
+    def buttons(self, index, player=None, until=None):
+        # Buttons for one sim step: what's held, plus anything pressed since
+        # the last step even if already released. With the player given,
+        # attacks pressed while it's busy are kept until it's free.
+        held = self.held[index]
+        pressed = 0
+        pending = self.pending[index]
+        for t, button, down in self.rings[index].pop_until(until):
+            if down:
+                held |= button
+                pressed |= button
+                self.unpresented.append(t)
+                if button in MOVE_BITS:
+                    pending[button] = self.buffer_frames
+            else:
+                held &= ~button
+        self.held[index] = held
+        buttons = held | pressed
+        if player is None or not sim.BUSY[player.state]:
+            for button in pending:
+                buttons |= button
+            pending.clear()
+        else:
+            for button in list(pending):
+                pending[button] -= 1
+                if pending[button] <= 0:
+                    del pending[button]
+        return buttons
+
+    def skip(self, index=None):
+        # No sim step this frame (menu, pause), or nothing reads this
+        # player's keys (CPU opponent, brawl): keep track of what's held,
+        # drop the presses so they don't all fire on resume or fill the ring
+        rings = enumerate(self.rings) if index is None else [(index, self.rings[index])]
+        for index, ring in rings:
+            for _, button, down in ring.pop_until():
+                if down:
+                    self.held[index] |= button
+                else:
+                    self.held[index] &= ~button
+            self.pending[index].clear()
+
+    def presented(self, now=None):
+        # Call right after the frame is shown
+        if not self.unpresented:
+            return
+        if now is None:
+            now = self.clock()
+        for t in self.unpresented:
+            self.latencies[self.latency_count % len(self.latencies)] = now - t
+            self.latency_count += 1
+        self.unpresented.clear()
+
+    def report(self):
+        count = min(self.latency_count, len(self.latencies))
+        times = sorted(self.latencies[:count])
+        return {
+            "presses": self.latency_count,
+            "dropped": sum(ring.dropped for ring in self.rings),
+            "p50_ms": percentile(times, 50) * 1000,
+            "p90_ms": percentile(times, 90) * 1000,
+            "p99_ms": percentile(times, 99) * 1000,
+            "max_ms": (times[-1] if times else 0.0) * 1000,
+        }
+
+    def summary(self):
+        r = self.report()
+        return (f"{r['presses']} presses, input to present p50 {r['p50_ms']:.2f} ms / "
+                f"p90 {r['p90_ms']:.2f} ms / p99 {r['p99_ms']:.2f} ms / max {r['max_ms']:.2f} ms, "
+                f"{r['dropped']} dropped")
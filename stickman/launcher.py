@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+
+import pygame
+
+# One entry point for every version of the game:
+#   python -m stickman.launcher [V1|V2|V3] [game options]
+# Game options go through to V3 (see its --help). None of the scripts start
+# pygame or open a window until their first frame, so loading one here, or
+# from a tool or benchmark, costs only the imports.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VERSIONS = ("V1", "V2", "V3")
+
+def load(version):
+    # The game scripts have spaces in their names, so import them by path
+    path = os.path.join(ROOT, f"2d fighting game {version}.py")
+    spec = importlib.util.spec_from_file_location(f"fighting_game_{version.lower()}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def quit_after_first_frame():
+    # Prints "first frame" once it's presented and has the game quit, for
+    # timing startup from outside the process
+    flip, update = pygame.display.flip, pygame.display.update
+
+    def present(*rects):
+        result = update(*rects) if rects else flip()
+        pygame.display.flip, pygame.display.update = flip, update
+        print("first frame", flush=True)
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        return result
+
+    pygame.display.flip = pygame.display.update = present
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a version of Stickman Fighting Game")
+    parser.add_argument("version", nargs="?", choices=VERSIONS, default="V3")
+    parser.add_argument("--startup-check", action="store_true",
+                        help="quit as soon as the first frame is shown")
+    args, game_args = parser.parse_known_args(argv)
+    game = load(args.version)
+    if args.startup_check:
+        quit_after_first_frame()
+    if hasattr(game, "parse_args"):
+        asyncio.run(game.update_loop(game.parse_args(game_args)))
+    else:
+        if game_args:
+            parser.error(f"{args.version} takes no options: {' '.join(game_args)}")
+        asyncio.run(game.update_loop())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
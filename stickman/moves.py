@@ -0,0 +1,124 @@
+import json
+import os
+from fractions import Fraction
+
+# Move definitions (timing, damage, hitboxes, limb poses) live in moves.json
+# and are compiled once, at import, into tables indexed by frame number.
+# Adding a move to the file gives it a state code, a hitbox and a pose
+# without touching the sim or the renderer.
+#
+# Per move, frames run startup, then active (hitbox out), then recovery.
+# Offsets are in pixels from the head centre (hitbox) or from the shoulder
+# or hip (limb end) for a fighter facing right; "extend" stretches x by up
+# to that fraction over the active frames. A one-frame window is at its end
+# on that frame. Timings have to be whole frames, at least one per move.
+#
+# Each move also gets integer hitboxes computed from exact fractions, and
+# there's an integer hit pull table, for the deterministic sim: the float
+# tables go through the C library's pow(), which isn't guaranteed to round
+# the same on every platform.
+
+MOVES_PATH = os.path.join(os.path.dirname(__file__), "moves.json")
+
+# Fractions in the integer tables are fixed point with this many bits
+FIXED_SHIFT = 16
+FIXED_ONE = 1 << FIXED_SHIFT
+
+# Easing function for animations; exact when given a Fraction
+def ease_in_out_cubic(t):
+    t *= 2
+    if t < 1:
+        return t ** 3 / 2
+    t -= 2
+    return (t ** 3 + 2) / 2
+
+class MoveError(Exception):
+    pass
+
+def progress(frame, last):
+    # frame / last, the share of a window done; a one-frame window is done at once
+    return frame / last if last > 0 else 1
+
+def exact(value):
+    # 0.2 in the JSON means 1/5, not the nearest double
+    return Fraction(str(value))
+
+class Move:
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.button = spec["button"]
+        self.startup = spec["startup"]
+        self.active = spec["active"]
+        self.recovery = spec["recovery"]
+        self.frames = self.startup + self.active + self.recovery
+        self.damage = spec["damage"]
+        self.knockback = spec["knockback"]
+        self.limb = spec["limb"]
+        self.hitboxes = []  # Per frame: None, or (x offset, y offset, width, height)
+        self.fixed_hitboxes = []  # Same, in whole pixels
+        self.poses = []  # Per frame: limb end (x offset, y offset)
+
+        hitbox, windup, strike = spec["hitbox"], spec["windup"], spec["strike"]
+        last = self.frames - 1
+        split = progress(self.startup, last)
+        active_end = progress(self.startup + self.active - 1, last)
+        for frame in range(self.frames):
+            t = progress(frame, last)
+            if frame < self.startup:
+                # Wind up: pull the limb back
+                t = ease_in_out_cubic(t / split)
+                self.poses.append((windup["x"] * t, windup["y"] * t))
+                self.hitboxes.append(None)
+                continue
+            # Strike, then hold the extended limb through recovery
+            t = ease_in_out_cubic(min(1, progress(t - split, active_end - split)))
+            self.poses.append((strike["x"] * (1 + strike["extend"] * t), strike["y"]))
+            if frame < self.startup + self.active:
+                self.hitboxes.append((hitbox["x"] * (1 + hitbox["extend"] * t), hitbox["y"],
+                                      hitbox["width"], hitbox["height"]))
+            else:
+                self.hitboxes.append(None)
+
+        for frame in range(self.frames):
+            if self.startup <= frame < self.startup + self.active:
+                if self.active > 1:
+                    t = ease_in_out_cubic(Fraction(frame - self.startup, self.active - 1))
+                else:
+                    t = Fraction(1)
+                x = exact(hitbox["x"]) * (1 + exact(hitbox["extend"]) * t)
+                self.fixed_hitboxes.append((round(x), round(exact(hitbox["y"])),
+                                            round(exact(hitbox["width"])),
+                                            round(exact(hitbox["height"]))))
+            else:
+                self.fixed_hitboxes.append(None)
+
+def is_count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+def check_timing(spec, index):
+    name = spec.get("name", f"#{index + 1}")
+    for key in ("startup", "active", "recovery"):
+        if not is_count(spec.get(key)):
+            raise MoveError(f"move {name}: {key} has to be a whole number of frames, "
+                            f"got {spec.get(key)!r}")
+    if spec["startup"] + spec["active"] + spec["recovery"] < 1:
+        raise MoveError(f"move {name}: needs at least one frame")
+
+def load_moves(path=MOVES_PATH):
+    # Returns (moves in file order, hitstun frames)
+    with open(path) as f:
+        data = json.load(f)
+    if not is_count(data["hitstun"]) or data["hitstun"] < 2:
+        raise MoveError(f"hitstun has to be at least 2 frames, got {data['hitstun']!r}")
+    for index, spec in enumerate(data["moves"]):
+        check_timing(spec, index)
+    return [Move(spec) for spec in data["moves"]], data["hitstun"]
+
+def hit_pull(hitstun):
+    # Fraction of the way to the knockback target, by frames spent in hitstun
+    return tuple(ease_in_out_cubic(frame / (hitstun - 1)) for frame in range(hitstun + 1))
+
+def hit_pull_fixed(hitstun):
+    # hit_pull() in fixed point, from exact fractions
+    return tuple(round(ease_in_out_cubic(Fraction(frame, hitstun - 1)) * FIXED_ONE)
+                 for frame in range(hitstun + 1))
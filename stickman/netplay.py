@@ -0,0 +1,244 @@
+import asyncio
+import random
+import struct
+
+from stickman import sim
+
+# GGPO-style rollback netplay. Each side simulates ahead with a prediction of
+# the remote player's input (their last known one). When the real input
+# arrives and differs, the match is restored to the snapshot before that
+# frame and re-simulated up to the present inside the same tick.
+#
+# Online matches use the deterministic sim, and every packet carries the
+# checksum of the newest frame the sender has confirmed. Each side takes a
+# checksum of every frame it simulates, so a desync is reported at the first
+# confirmed frame where the two states differ, not when the fight visibly
+# goes wrong.
+
+MAX_ROLLBACK = 8
+INPUT_DELAY = 2
+# Every packet resends all the local inputs the peer hasn't acknowledged, so
+# a lost packet costs nothing. Confirmed checksums are kept this many frames
+# back, to check the peer's late ones against
+MAX_REDUNDANT = 32
+
+# kind, ack, first input frame, checksum frame, checksum, then the inputs
+PACKET = struct.Struct("<BiiiI")
+INPUT_PACKET = 1
+
+class RollbackSession:
+    def __init__(self, match, local_player, max_rollback=MAX_ROLLBACK, input_delay=INPUT_DELAY):
+        self.match = match
+        self.local_player = local_player
+        self.max_rollback = max_rollback
+        self.input_delay = input_delay
+        self.local_inputs = {frame: 0 for frame in range(input_delay)}
+        self.remote_inputs = {}
+        self.last_remote_frame = -1
+        self.remote_ack = -1  # Peer has every local input up to this frame
+        self.predicted = {}
+        self.snapshots = {}
+        self.rollback_to = None
+        self.checksums = {}  # Frame -> checksum of the state going into it, while unconfirmed
+        self.confirmed_checksums = {}  # Recent confirmed ones, to check the peer's against
+        self.remote_checksums = {}  # Peer's, for frames not confirmed here yet
+        self.last_checksum_frame = -1
+        self.desync_frame = None  # First frame the two sides disagree on
+        # Stats
+        self.rollbacks = 0
+        self.resimulated_frames = 0
+        self.stalls = 0
+
+    @property
+    def frame(self):
+        return self.match.frame
+
+    @property
+    def last_local_frame(self):
+        return self.frame + self.input_delay
+
+    def add_local_input(self, buttons):
+        # Inputs are never changed once added, they may already be on the wire
+        frame = self.frame + self.input_delay
+        if frame not in self.local_inputs:
+            self.local_inputs[frame] = buttons
+        return frame
+
+    def add_remote_inputs(self, start_frame, inputs):
+        for frame, buttons in enumerate(inputs, start_frame):
+            if frame <= self.last_remote_frame or frame in self.remote_inputs:
+                continue
+            self.remote_inputs[frame] = buttons
+            predicted = self.predicted.pop(frame, None)
+            if predicted is not None and predicted != buttons:
+                if self.rollback_to is None or frame < self.rollback_to:
+                    self.rollback_to = frame
+        while self.last_remote_frame + 1 in self.remote_inputs:
+            self.last_remote_frame += 1
+
+    def add_remote_ack(self, frame):
+        self.remote_ack = max(self.remote_ack, frame)
+
+    def add_remote_checksum(self, frame, checksum):
+        if frame < 0:
+            return
+        local = self.confirmed_checksums.get(frame)
+        if local is not None:
+            self._check(frame, local, checksum)
+        elif frame > self.last_checksum_frame:
+            self.remote_checksums[frame] = checksum
+
+    def latest_checksum(self):
+        # (frame, checksum) of the newest confirmed frame, for sending
+        if self.last_checksum_frame < 0:
+            return -1, 0
+        return self.last_checksum_frame, self.confirmed_checksums[self.last_checksum_frame]
+
+    def _check(self, frame, local, remote):
+        if local != remote and (self.desync_frame is None or frame < self.desync_frame):
+            self.desync_frame = frame
+
+    def unacked_local_inputs(self):
+        # (first frame, inputs) the peer hasn't acknowledged, for sending. Never
+        # skips any: the peer can't advance without them, and stalls for good
+        # if one is missing
+        frame = self.remote_ack + 1
+        inputs = []
+        while frame + len(inputs) in self.local_inputs:
+            inputs.append(self.local_inputs[frame + len(inputs)])
+        return frame, inputs
+
+    def can_advance(self):
+        return (self.frame in self.local_inputs
+                and self.frame - self.last_remote_frame <= self.max_rollback)
+
+    def advance(self):
+        # One tick: roll back if a prediction was wrong, then step one new frame.
+        # Returns the new frame's hit events, or None when stalled waiting for the peer.
+        if self.rollback_to is not None:
+            target = self.frame
+            self.match.load_state(self.snapshots[self.rollback_to])
+            self.rollbacks += 1
+            self.resimulated_frames += target - self.rollback_to
+            self.rollback_to = None
+            while self.frame < target:
+                self._simulate()
+        self._prune()
+        if not self.can_advance():
+            self.stalls += 1
+            return None
+        return self._simulate()
+
+    def _simulate(self):
+        frame = self.frame
+        self.snapshots[frame] = self.match.save_state()
+        self.checksums[frame] = self.match.checksum()
+        remote = self.remote_inputs.get(frame)
+        if remote is None:
+            remote = self.remote_inputs.get(self.last_remote_frame, 0)
+            self.predicted[frame] = remote
+        local = self.local_inputs[frame]
+        if self.local_player == 0:
+            return self.match.step(local, remote)
+        return self.match.step(remote, local)
+
+    def _prune(self):
+        # Frames up to last_remote_frame are confirmed and can't be rolled back
+        # any more; keep the snapshot just after them as the next rollback target
+        confirmed = min(self.last_remote_frame, self.frame - 1)
+        for frames in (self.snapshots, self.predicted):
+            for frame in [f for f in frames if f <= confirmed]:
+                del frames[frame]
+        for frame in sorted(f for f in self.checksums if f <= confirmed):
+            checksum = self.confirmed_checksums[frame] = self.checksums.pop(frame)
+            self.last_checksum_frame = frame
+            remote = self.remote_checksums.pop(frame, None)
+            if remote is not None:
+                self._check(frame, checksum, remote)
+        for frames in (self.confirmed_checksums, self.remote_checksums):
+            for frame in [f for f in frames if f < confirmed - MAX_REDUNDANT]:
+                del frames[frame]
+        for frame in [f for f in self.remote_inputs if f < confirmed]:
+            del self.remote_inputs[frame]
+        # Local inputs go once the peer has them and they can't be re-simulated
+        acked = min(self.remote_ack, confirmed)
+        for frame in [f for f in self.local_inputs if f <= acked]:
+            del self.local_inputs[frame]
+
+class NetPeer(asyncio.DatagramProtocol):
+    # UDP transport for a RollbackSession. latency (seconds), jitter and loss
+    # (0-1) simulate a bad connection on the sending side, for testing.
+    def __init__(self, session, remote_addr=None, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.session = session
+        self.remote_addr = remote_addr
+        # Joining side uses a connected socket, which only talks to the host
+        self.connected = remote_addr is not None
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.transport = None
+        self.packets_sent = 0
+        self.packets_received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if self.connected:
+            # The host's address as packets from it will give it, not as joined by
+            self.remote_addr = transport.get_extra_info("peername")
+
+    def datagram_received(self, data, addr):
+        if len(data) < PACKET.size:
+            return
+        kind, ack, start_frame, checksum_frame, checksum = PACKET.unpack_from(data)
+        if kind != INPUT_PACKET:
+            return
+        if self.remote_addr is None:
+            # Host side: the first packet tells us who we're playing
+            self.remote_addr = addr
+        elif addr != self.remote_addr:
+            return
+        self.packets_received += 1
+        self.session.add_remote_ack(ack)
+        self.session.add_remote_inputs(start_frame, data[PACKET.size:])
+        self.session.add_remote_checksum(checksum_frame, checksum)
+
+    def send_inputs(self):
+        if self.transport is None or self.remote_addr is None:
+            return
+        start_frame, inputs = self.session.unacked_local_inputs()
+        data = PACKET.pack(INPUT_PACKET, self.session.last_remote_frame, start_frame,
+                           *self.session.latest_checksum()) + bytes(inputs)
+        self.packets_sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            return
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter) if self.latency else 0
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._sendto, data)
+        else:
+            self._sendto(data)
+
+    def _sendto(self, data):
+        if not self.transport.is_closing():
+            self.transport.sendto(data, None if self.connected else self.remote_addr)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+async def host(session, port, bind="0.0.0.0", **options):
+    loop = asyncio.get_running_loop()
+    transport, peer = await loop.create_datagram_endpoint(
+        lambda: NetPeer(session, **options), local_addr=(bind, port))
+    return peer
+
+async def join(session, address, port, **options):
+    loop = asyncio.get_running_loop()
+    remote = (address, port)
+    transport, peer = await loop.create_datagram_endpoint(
+        lambda: NetPeer(session, remote_addr=remote, **options), remote_addr=remote)
+    return peer
+
+def new_match(player_cls=sim.Player):
+    # Both sides have to start from the same state; nobody is AI online
+    return sim.Match(ai_mode=False, seed=0, player_cls=player_cls, deterministic=True)
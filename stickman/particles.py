@@ -0,0 +1,209 @@
+import numpy as np
+import pygame
+
+from stickman import sim
+
+# Hit sparks and dust in a fixed-capacity pool of NumPy arrays. Live
+# particles are packed at the front of the arrays, so an update is a handful
+# of whole-array operations over [:count], and the holes dead ones leave
+# are filled from the end. No Python object exists per particle; when the
+# pool is full new particles are dropped and counted.
+#
+# Colours are indexes into a small palette, pre-mapped to the surface's
+# pixel format at every fade level, so drawing is a gather from the palette
+# and a scatter straight into the surface's pixels for the whole batch.
+
+MAX_PARTICLES = 4096
+DRAG = 0.92
+SIZE = 2  # Particles are SIZE x SIZE pixel squares
+FADE_LEVELS = 16
+
+PALETTE = ((255, 220, 40), (255, 150, 20), (255, 90, 0),  # Sparks
+           (150, 130, 110), (180, 165, 140))  # Dust
+SPARKS = np.array([0, 1, 2], dtype=np.uint8)
+DUST = np.array([3, 4], dtype=np.uint8)
+LAYER_COLORKEY = (255, 0, 255)  # Not in the palette at any fade level
+
+class ParticlePool:
+    def __init__(self, background, capacity=MAX_PARTICLES, seed=None):
+        self.background = background
+        self.capacity = capacity
+        self.count = 0
+        self.dropped = 0
+        self.version = 0  # Changes whenever the particles look different
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.gravity = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.ones(capacity, dtype=np.float32)
+        # Palette index * FADE_LEVELS, the row of its fade levels
+        self.color = np.zeros(capacity, dtype=np.intp)
+        # Scratch space for drawing, sized once
+        self.fade = np.zeros(capacity, dtype=np.float32)
+        self.shade = np.zeros(capacity, dtype=np.intp)
+        self.pixel = np.zeros((capacity, 2), dtype=np.intp)
+        self.offset = np.zeros(capacity, dtype=np.intp)
+        self.mapped = {}  # Surface format -> palette as pixel values
+        self.layer = None  # For surfaces that aren't 32-bit
+        # Effects only, so they get their own RNG and never touch the sim's
+        self.rng = np.random.default_rng(seed)
+
+    def spawn(self, x, y, n, speed, angles, life, colors, gravity=0.0):
+        # n particles at (x, y), directions in angles (radians, lo, hi),
+        # speeds up to speed px/frame, living life (lo, hi) frames, colours
+        # picked from the PALETTE indexes in colors
+        room = self.capacity - self.count
+        if n > room:
+            self.dropped += n - room
+            n = room
+        if n <= 0:
+            return 0
+        s = slice(self.count, self.count + n)
+        rng = self.rng
+        angle = rng.uniform(angles[0], angles[1], n)
+        magnitude = rng.uniform(speed * 0.3, speed, n)
+        self.position[s] = x, y
+        self.velocity[s, 0] = np.cos(angle) * magnitude
+        self.velocity[s, 1] = np.sin(angle) * magnitude
+        self.gravity[s] = gravity
+        self.lifetime[s] = self.life[s] = rng.integers(life[0], life[1] + 1, n)
+        self.color[s] = colors[rng.integers(0, len(colors), n)] * FADE_LEVELS
+        self.count += n
+        self.version += 1
+        return n
+
+    def spawn_hit(self, event):
+        # A burst of sparks at the contact point, dust kicked up from the floor below it
+        x, y = event.contact
+        self.spawn(x, y, 24 + event.damage * 2, 7.0, (0, 2 * np.pi), (8, 20), SPARKS, 0.25)
+        self.spawn(x, sim.HEIGHT - SIZE, 12, 2.0, (np.pi, 2 * np.pi), (20, 40), DUST, -0.02)
+
+    def spawn_hits(self, events):
+        for event in events:
+            self.spawn_hit(event)
+
+    def update(self):
+        # One sim frame
+        n = self.count
+        if not n:
+            return
+        velocity = self.velocity[:n]
+        velocity[:, 1] += self.gravity[:n]
+        velocity *= DRAG
+        self.position[:n] += velocity
+        life = self.life[:n]
+        life -= 1
+        dead = np.flatnonzero(life <= 0)
+        if len(dead):
+            # Fill the holes left in the first live slots with survivors
+            # from the end, so the work scales with the dead, not the pool
+            live = n - len(dead)
+            holes = dead[dead < live]
+            movers = np.flatnonzero(life[live:] > 0) + live
+            for array in self.arrays():
+                array[holes] = array[movers]
+            self.count = live
+        self.version += 1
+
+    def save_state(self):
+        # Live particles and the RNG, for carrying the effects over to another pool
+        n = self.count
+        return (tuple(array[:n].copy() for array in self.arrays()),
+                self.rng.bit_generator.state, self.dropped)
+
+    def load_state(self, state):
+        arrays, rng_state, self.dropped = state
+        n = len(arrays[0])
+        for array, saved in zip(self.arrays(), arrays):
+            array[:n] = saved
+        self.count = n
+        self.rng.bit_generator.state = rng_state
+        self.version += 1
+
+    def arrays(self):
+        return (self.position, self.velocity, self.gravity, self.life, self.lifetime, self.color)
+
+    def clear(self):
+        if self.count:
+            self.count = 0
+            self.version += 1
+
+    def bounds(self):
+        # Screen area the live particles cover
+        position = self.position[:self.count]
+        left, right = position[:, 0].min(), position[:, 0].max()
+        top, bottom = position[:, 1].min(), position[:, 1].max()
+        return pygame.Rect(int(left), int(top), int(right) - int(left) + SIZE + 1,
+                           int(bottom) - int(top) + SIZE + 1)
+
+    def palette(self, surface):
+        # Every colour at every fade level, as this surface's pixel values
+        key = surface.get_bitsize(), surface.get_masks()
+        mapped = self.mapped.get(key)
+        if mapped is None:
+            background = pygame.Color(self.background)
+            shades = [pygame.Color(color).lerp(background, 1 - (level + 1) / FADE_LEVELS)
+                      for color in PALETTE for level in range(FADE_LEVELS)]
+            mapped = self.mapped[key] = np.array([surface.map_rgb(shade) for shade in shades],
+                                                 dtype=np.uint32)
+        return mapped
+
+    def draw(self, surface, origin=(0, 0)):
+        # origin: where the surface's top left is on screen. The scatter
+        # writes whole 32-bit pixels; other surfaces get a 32-bit layer
+        # drawn over them
+        n = self.count
+        if not n:
+            return
+        if surface.get_bitsize() != 32:
+            self.draw_layer(surface)
+            return
+        # Fade level from the share of life left: the last level is full colour
+        fade = self.fade[:n]
+        np.divide(self.life[:n], self.lifetime[:n], out=fade)
+        fade *= FADE_LEVELS - 0.001
+        shade = self.shade[:n]
+        np.add(self.color[:n], fade, out=shade, casting="unsafe")
+        pixel = self.pixel[:n]
+        np.floor(self.position[:n], out=pixel, casting="unsafe")
+        if origin != (0, 0):
+            pixel -= origin
+        # Stay inside the clip, which DirtyRenderer uses to redraw one area at a time
+        clip = surface.get_clip()
+        x, y = pixel[:, 0], pixel[:, 1]
+        inside = ((x >= clip.left) & (x <= clip.right - SIZE)
+                  & (y >= clip.top) & (y <= clip.bottom - SIZE))
+        row = surface.get_pitch() // 4
+        offset = self.offset[:n]
+        np.multiply(y, row, out=offset)
+        offset += x
+        offset = offset[inside]
+        values = self.palette(surface)[shade[inside]]
+        buffer = surface.get_buffer()
+        pixels = np.frombuffer(buffer, dtype=np.uint32)
+        for dy in range(SIZE):
+            for dx in range(SIZE):
+                pixels[offset + (dy * row + dx)] = values
+        del pixels, buffer  # Unlocks the surface
+
+    def draw_layer(self, surface):
+        clip = self.bounds().clip(surface.get_clip())
+        if not clip:
+            return
+        layer = self.layer
+        if layer is None or layer.get_width() < clip.width or layer.get_height() < clip.height:
+            # Sized once to the whole surface, reused every frame
+            layer = self.layer = pygame.Surface(surface.get_size(), 0, 32)
+            layer.set_colorkey(LAYER_COLORKEY)
+        # Particles drawn at the clip's offset into the layer's top left
+        area = pygame.Rect(0, 0, clip.width, clip.height)
+        layer.fill(LAYER_COLORKEY, area)
+        layer.set_clip(area)
+        self.draw(layer, clip.topleft)
+        surface.blit(layer, clip, area)
+
+    def item(self):
+        # As a DirtyRenderer item, or None with nothing to draw
+        if not self.count:
+            return None
+        return self.bounds(), self.version, self.draw
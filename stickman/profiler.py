@@ -0,0 +1,119 @@
+import csv
+import time
+from array import array
+
+import pygame
+
+# Per-phase frame profiler. Code calls lap(phase) at the end of each phase,
+# which charges the time since the previous lap to that phase in the
+# current frame's slot of a fixed-size ring buffer. NULL_PROFILER has the
+# same interface and does nothing, so a disabled profiler costs one no-op
+# call per phase.
+
+PHASES = ("events", "input", "collision", "update", "menu", "draw", "present", "overlay", "wait")
+# Phases that aren't real work, left out of the busy time
+IDLE_PHASES = ("wait",)
+
+class NullProfiler:
+    enabled = False
+
+    def lap(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+class FrameProfiler:
+    enabled = True
+
+    def __init__(self, size=3600, clock=time.perf_counter):
+        self.size = size
+        self.clock = clock
+        self.samples = {phase: array("d", bytes(8 * size)) for phase in PHASES}
+        self.frame = 0
+        self.last = clock()
+        self.overlay = None
+        self.overlay_version = None
+
+    def lap(self, phase):
+        now = self.clock()
+        self.samples[phase][self.frame % self.size] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        self.frame += 1
+        slot = self.frame % self.size
+        for samples in self.samples.values():
+            samples[slot] = 0.0
+
+    def count(self):
+        return min(self.frame, self.size)
+
+    def history(self, phase, frames=None):
+        # Completed frames for phase, oldest first
+        count = self.count() if frames is None else min(frames, self.count())
+        samples = self.samples[phase]
+        return [samples[(self.frame - count + i) % self.size] for i in range(count)]
+
+    def busy_history(self, frames=None):
+        totals = None
+        for phase in PHASES:
+            if phase in IDLE_PHASES:
+                continue
+            values = self.history(phase, frames)
+            totals = values if totals is None else [a + b for a, b in zip(totals, values)]
+        return totals
+
+    def percentiles(self, phase, ps=(50, 99)):
+        # The same indexing as --frame-stats; scheduler needs sim, which needs this module
+        from stickman.scheduler import percentile
+        values = sorted(self.history(phase))
+        return [percentile(values, p) for p in ps]
+
+    def write_csv(self, path):
+        phases = list(PHASES)
+        columns = [self.history(phase) for phase in phases]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{phase}_ms" for phase in phases])
+            first = self.frame - self.count()
+            for i, row in enumerate(zip(*columns)):
+                writer.writerow([first + i] + [f"{value * 1000:.4f}" for value in row])
+
+    def version(self, refresh=15):
+        # Changes whenever the overlay content is rebuilt
+        return self.frame // refresh
+
+    def draw_overlay(self, screen, pos=(10, 80), frames=120, refresh=15):
+        # Text and graph are rebuilt every `refresh` frames, blitted every frame
+        version = self.version(refresh)
+        if self.overlay is None or self.overlay_version != version:
+            self.overlay = self.build_overlay(frames)
+            self.overlay_version = version
+        return screen.blit(self.overlay, pos)
+
+    def overlay_rect(self, pos=(10, 80), frames=120):
+        return pygame.Rect(pos, (frames * 2 + 140, 60 + 16 * len(PHASES)))
+
+    def build_overlay(self, frames):
+        from stickman import ui
+        rect = self.overlay_rect((0, 0), frames)
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+
+        # Busy time per frame, with a line at the 60 Hz budget
+        graph_height = 50
+        budget = 1 / 60
+        pygame.draw.line(surface, (255, 80, 80), (4, 4), (4 + frames * 2, 4))
+        for i, value in enumerate(self.busy_history(frames)):
+            height = min(graph_height, int(value / budget * graph_height))
+            pygame.draw.line(surface, (80, 255, 80), (4 + i * 2, 4 + graph_height),
+                             (4 + i * 2, 4 + graph_height - height), 2)
+        for i, phase in enumerate(PHASES):
+            p50, p99 = self.percentiles(phase)
+            text = ui.render_text(f"{phase:<10} p50 {p50 * 1000:6.2f}  p99 {p99 * 1000:6.2f} ms",
+                                  18, (255, 255, 255))
+            surface.blit(text, (4, 60 + 16 * i))
+        return surface
@@ -0,0 +1,77 @@
+import pygame
+
+from stickman.profiler import NULL_PROFILER
+
+# Dirty-rectangle renderer for scenes made of a few small items on a plain
+# background. Each frame the scene passes {name: (rect, key, draw)}: rect is
+# the area draw(screen) can touch and key changes whenever the item looks
+# different. Only items whose rect or key changed are cleared, redrawn and
+# pushed with display.update(); enabled=False falls back to full redraws.
+
+class DirtyRenderer:
+    def __init__(self, background, enabled=True, max_rects=32):
+        self.background = background
+        self.enabled = enabled
+        # Past this many changed items a full redraw is cheaper (crowd scenes)
+        self.max_rects = max_rects
+        self.previous = {}
+        self.full = True
+        self.dirty_area = 0
+
+    def invalidate(self):
+        # Next frame redraws and flips everything (scene change, expose, overlay)
+        self.full = True
+
+    def render(self, screen, items, profiler=NULL_PROFILER):
+        if self.full or not self.enabled:
+            screen.fill(self.background)
+            for rect, key, draw in items.values():
+                draw(screen)
+            profiler.lap("draw")
+            pygame.display.flip()
+            profiler.lap("present")
+            self.remember(items)
+            self.full = False
+            self.dirty_area = screen.get_width() * screen.get_height()
+            return None
+
+        dirty = []
+        for name, (rect, key, draw) in items.items():
+            old = self.previous.get(name)
+            if old is None:
+                dirty.append(rect)
+            elif old[0] != rect:
+                dirty.append(rect.union(old[0]))
+            elif old[1] != key:
+                dirty.append(rect)
+        for name, (rect, key) in self.previous.items():
+            if name not in items:
+                dirty.append(rect)
+        if len(dirty) > self.max_rects:
+            self.full = True
+            return self.render(screen, items, profiler)
+        self.remember(items)
+        if not dirty:
+            self.dirty_area = 0
+            profiler.lap("draw")
+            return dirty
+
+        bounds = screen.get_rect()
+        dirty = [rect.clip(bounds) for rect in dirty]
+        # Clear each area and redraw everything touching it, clipped so
+        # translucent items never blend over themselves
+        for rect in dirty:
+            screen.set_clip(rect)
+            screen.fill(self.background)
+            for item_rect, key, draw in items.values():
+                if item_rect.colliderect(rect):
+                    draw(screen)
+        screen.set_clip(None)
+        profiler.lap("draw")
+        pygame.display.update(dirty)
+        profiler.lap("present")
+        self.dirty_area = sum(rect.width * rect.height for rect in dirty)
+        return dirty
+
+    def remember(self, items):
+        self.previous = {name: (rect, key) for name, (rect, key, draw) in items.items()}
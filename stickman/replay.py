@@ -0,0 +1,208 @@
+import argparse
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from stickman import sim
+
+# Replay files: the match seed and both players' starting state, then one
+# byte of input per frame (player 1 in the low nibble, player 2 in the high
+# nibble), written in zlib-compressed chunks as the match runs. Each chunk
+# ends with Match.checksum() after every one of its frames, so playback can
+# name the first frame that differs. Deterministic matches store positions
+# as ints and play back the same on any machine.
+#
+#   header: b"STKR", version, seed, flags, 2 x player state
+#   chunk:  frame count, compressed size, compressed inputs, frame count x state CRC
+#
+# The CRCs are random bits and stay uncompressed, 4 bytes a frame. Playback
+# only compares a chunk's last one unless that differs, then replays the
+# chunk frame by frame to find where.
+
+MAGIC = b"STKR"
+VERSION = 5
+CHUNK_FRAMES = 4096
+DETERMINISTIC = 1  # Header flag
+
+HEADER = struct.Struct("<4sBQB")
+PLAYER = struct.Struct("<ddbiBHidii?")
+FIXED_PLAYER = struct.Struct("<qqbiBHiqii?")
+CHUNK = struct.Struct("<II")
+CRC_TYPE = "I"  # One little-endian uint32 per frame
+
+class ReplayError(Exception):
+    pass
+
+def pack_player(player, layout=PLAYER):
+    return layout.pack(player.x, player.y, player.facing, player.health,
+                       player.state, player.animation_frame, player.hit_cooldown,
+                       player.target_x, player.ai_action_timer, player.ai_action_duration,
+                       player.is_ai)
+
+def unpack_player(data, player, layout=PLAYER):
+    (player.x, player.y, player.facing, player.health, player.state, player.animation_frame,
+     player.hit_cooldown, player.target_x, player.ai_action_timer, player.ai_action_duration,
+     player.is_ai) = layout.unpack(data)
+    player.prev_x = player.x
+
+def state_crc(match):
+    return match.checksum()
+
+def check_chunk(match, start_state, inputs, crcs):
+    # Call after playing inputs from start_state. Raises ReplayError naming
+    # the first frame whose state doesn't match the recording
+    if state_crc(match) == crcs[-1]:
+        return
+    match.load_state(start_state)
+    for byte, crc in zip(inputs, crcs):
+        match.step(byte & 0xF, byte >> 4)
+        if state_crc(match) != crc:
+            break
+    raise ReplayError(f"replay diverged at frame {match.frame}")
+
+class ReplayWriter:
+    def __init__(self, path, match, chunk_frames=CHUNK_FRAMES):
+        if match.frame != 0:
+            raise ReplayError("recording has to start before the first frame")
+        self.match = match
+        self.chunk_frames = chunk_frames
+        self.file = open(path, "wb")
+        flags = DETERMINISTIC if match.deterministic else 0
+        layout = FIXED_PLAYER if match.deterministic else PLAYER
+        self.file.write(HEADER.pack(MAGIC, VERSION, match.seed, flags))
+        self.file.write(pack_player(match.player1, layout) + pack_player(match.player2, layout))
+        self.inputs = bytearray()
+        self.crcs = array(CRC_TYPE)
+        self.frames = 0
+
+    def record(self, inputs_p1, inputs_p2):
+        # Call once per Match.step(), after it, with the same inputs
+        self.inputs.append((inputs_p1 & 0xF) | (inputs_p2 & 0xF) << 4)
+        self.crcs.append(state_crc(self.match))
+        self.frames += 1
+        if len(self.inputs) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if not self.inputs:
+            return
+        data = zlib.compress(bytes(self.inputs))
+        self.file.write(CHUNK.pack(len(self.inputs), len(data)))
+        self.file.write(data)
+        if sys.byteorder != "little":
+            self.crcs.byteswap()
+        self.file.write(self.crcs.tobytes())
+        self.file.flush()
+        self.inputs.clear()
+        del self.crcs[:]
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ReplayReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        magic, version, self.seed, flags = HEADER.unpack(self._read(HEADER.size))
+        if magic != MAGIC:
+            raise ReplayError(f"{path} is not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        self.deterministic = bool(flags & DETERMINISTIC)
+        self.layout = FIXED_PLAYER if self.deterministic else PLAYER
+        self.players = (self._read(self.layout.size), self._read(self.layout.size))
+
+    def _read(self, size):
+        data = self.file.read(size)
+        if len(data) != size:
+            raise ReplayError("replay file is truncated")
+        return data
+
+    def new_match(self, player_cls=sim.Player):
+        if self.deterministic:
+            player_cls = sim.deterministic_player(player_cls)
+        player1, player2 = sim.default_players(player_cls=player_cls)
+        unpack_player(self.players[0], player1, self.layout)
+        unpack_player(self.players[1], player2, self.layout)
+        return sim.Match(player1, player2, seed=self.seed, deterministic=self.deterministic)
+
+    def chunks(self):
+        # Yields (inputs bytes, state CRC after each frame), one chunk in memory at a time
+        self.file.seek(HEADER.size + self.layout.size * 2)
+        while True:
+            header = self.file.read(CHUNK.size)
+            if not header:
+                return
+            if len(header) != CHUNK.size:
+                raise ReplayError("replay file is truncated")
+            frames, size = CHUNK.unpack(header)
+            inputs = zlib.decompress(self._read(size))
+            if len(inputs) != frames:
+                raise ReplayError("replay chunk is corrupt")
+            crcs = array(CRC_TYPE)
+            crcs.frombytes(self._read(frames * crcs.itemsize))
+            if sys.byteorder != "little":
+                crcs.byteswap()
+            yield inputs, crcs
+
+    def frames(self):
+        for inputs, crcs in self.chunks():
+            for byte in inputs:
+                yield byte & 0xF, byte >> 4
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def play(path, verify=True, player_cls=sim.Player):
+    # Runs a whole replay headless as fast as possible, returns (match, events)
+    events = []
+    with ReplayReader(path) as reader:
+        match = reader.new_match(player_cls)
+        step = match.step
+        for chunk, crcs in reader.chunks():
+            start_state = match.save_state()
+            for byte in chunk:
+                events.extend(step(byte & 0xF, byte >> 4))
+            if verify:
+                check_chunk(match, start_state, chunk, crcs)
+    return match, events
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or fast-forward stickman replays")
+    parser.add_argument("replays", nargs="+")
+    parser.add_argument("--no-verify", dest="verify", action="store_false",
+                        help="skip the per-frame state checks")
+    args = parser.parse_args(argv)
+    failed = 0
+    for path in args.replays:
+        start = time.perf_counter()
+        try:
+            match, events = play(path, verify=args.verify)
+        except ReplayError as e:
+            print(f"{path}: FAILED, {e}")
+            failed += 1
+            continue
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {match.frame} frames, {len(events)} hits, "
+              f"health {match.player1.health}/{match.player2.health}, "
+              f"{match.frame / max(elapsed, 1e-9):,.0f} frames/s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+from stickman import sim
+
+# Training-mode rewind: the last few seconds of a match as fixed-size packed
+# snapshots in one preallocated bytearray. record() writes in place with
+# Match.pack_into, so taking a snapshot every frame allocates nothing;
+# step_back() walks backwards and loads each snapshot into the match.
+# Playing on from any point just records over the frames that were rewound.
+
+SNAPSHOT_SIZE = sim.SNAPSHOT.size
+REWIND_SECONDS = 10
+
+class RewindBuffer:
+    def __init__(self, seconds=REWIND_SECONDS, fps=sim.FPS):
+        self.capacity = self.frames_for(seconds, fps)
+        if self.capacity < 1:
+            raise ValueError(f"can't rewind {seconds} s, that's less than a frame")
+        self.fps = fps
+        self.data = bytearray(SNAPSHOT_SIZE * self.capacity)
+        self.count = 0  # Snapshots recorded, the newest is count - 1
+        self.oldest = 0  # Older ones have been overwritten
+
+    @staticmethod
+    def frames_for(seconds, fps=sim.FPS):
+        return int(seconds * fps)
+
+    @property
+    def bytes_per_second(self):
+        return SNAPSHOT_SIZE * self.fps
+
+    def __len__(self):
+        return self.count - self.oldest
+
+    def record(self, match):
+        match.pack_into(self.data, (self.count % self.capacity) * SNAPSHOT_SIZE)
+        self.count += 1
+        if self.count - self.oldest > self.capacity:
+            self.oldest += 1
+
+    def load(self, match, index):
+        # index counts from the first snapshot ever recorded, like count
+        match.unpack_from(self.data, (index % self.capacity) * SNAPSHOT_SIZE)
+
+    def step_back(self, match):
+        # Drops the newest snapshot and puts the match back to the one before.
+        # Returns False once there's nothing older to go back to.
+        if len(self) < 2:
+            return False
+        self.count -= 1
+        self.load(match, self.count - 1)
+        return True
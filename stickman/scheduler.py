@@ -0,0 +1,172 @@
+import asyncio
+import platform
+import time
+
+import pygame
+
+from stickman import sim
+
+# Frame scheduler: fixed-timestep accumulator for the simulation, with
+# rendering run at its own rate (capped, uncapped or the display refresh).
+# Each frame waits exactly once, in wait(), instead of clock.tick() plus
+# asyncio.sleep().
+
+UNCAPPED = "uncapped"
+DISPLAY = "display"
+
+# Below this we stop sleeping and just yield, sleep() overshoots by ~1 ms
+SPIN_MARGIN = 0.002
+
+# Longest we block in idle mode before giving the asyncio loop a turn
+IDLE_TIMEOUT_MS = 250
+
+def display_refresh_rate(default=sim.FPS):
+    try:
+        rate = pygame.display.get_current_refresh_rate()
+    except (AttributeError, pygame.error):
+        return default
+    return rate or default
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class FrameScheduler:
+    def __init__(self, sim_rate=sim.FPS, render_rate=sim.FPS, max_steps=5, history=600,
+                 clock=time.perf_counter):
+        self.sim_dt = 1.0 / sim_rate
+        self.render_rate = render_rate
+        self.max_steps = max_steps
+        self.clock = clock
+        self.emscripten = platform.system() == "Emscripten"
+        self.set_render_rate(render_rate)
+
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self.due = 0  # Steps the last steps() call returned
+        self.last_time = None
+        self.frame_start = None
+        self.next_frame = None
+
+        # Ring buffer of frame times in seconds
+        self.frame_times = [0.0] * history
+        self.frame_count = 0
+        self.missed_deadlines = 0
+        self.dropped_steps = 0
+        self.sim_steps = 0
+
+    def set_render_rate(self, render_rate):
+        self.render_rate = render_rate
+        if render_rate == UNCAPPED or not render_rate:
+            self.render_dt = 0.0
+        elif render_rate == DISPLAY:
+            self.render_dt = 1.0 / display_refresh_rate()
+        else:
+            self.render_dt = 1.0 / render_rate
+
+    @property
+    def deadline(self):
+        # Frame budget used for the missed-deadline count
+        return self.render_dt or self.sim_dt
+
+    def steps(self):
+        # Number of simulation steps due since the last call, then alpha is
+        # the leftover fraction of a step for interpolating the render
+        now = self.clock()
+        if self.last_time is None:
+            self.last_time = now
+            self.frame_start = now
+            self.next_frame = now
+            self.alpha = 1.0
+            self.due = 1
+            return 1
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        count = int(self.accumulator / self.sim_dt)
+        if count > self.max_steps:
+            # Too far behind (debugger, window drag), drop time instead of spiralling
+            self.dropped_steps += count - self.max_steps
+            count = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= count * self.sim_dt
+        self.sim_steps += count
+        self.alpha = self.accumulator / self.sim_dt
+        self.due = count
+        return count
+
+    def step_time(self, step):
+        # When step (0-based, of those the last steps() returned) is due:
+        # the last one at that call, the others a sim step apart before it,
+        # so input that arrived by then is all taken this frame
+        return self.last_time - (self.due - 1 - step) * self.sim_dt
+
+    def resume(self):
+        # Restart timing after an idle wait so the pause isn't simulated or
+        # counted as a slow frame
+        now = self.clock()
+        self.last_time = now
+        self.frame_start = now
+        self.next_frame = now
+        self.accumulator = 0.0
+
+    async def wait_for_events(self, timeout_ms=IDLE_TIMEOUT_MS):
+        # Idle mode: block until there is input (or the timeout) instead of
+        # spinning frames. The browser can't block, so there we just yield.
+        if self.emscripten:
+            await asyncio.sleep(0)
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait(timeout_ms)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+        self.resume()
+        return events
+
+    async def wait(self):
+        if self.emscripten or not self.render_dt:
+            # The browser paces frames, or we render as fast as we can
+            await asyncio.sleep(0)
+        else:
+            self.next_frame += self.render_dt
+            now = self.clock()
+            if self.next_frame < now - self.render_dt:
+                # Missed by more than a frame, don't try to catch up
+                self.next_frame = now
+            delay = self.next_frame - now
+            if delay > SPIN_MARGIN:
+                await asyncio.sleep(delay - SPIN_MARGIN)
+            while self.clock() < self.next_frame:
+                await asyncio.sleep(0)
+        now = self.clock()
+        self.record(now - self.frame_start)
+        self.frame_start = now
+
+    def record(self, frame_time):
+        self.frame_times[self.frame_count % len(self.frame_times)] = frame_time
+        self.frame_count += 1
+        if frame_time > self.deadline * 1.05:
+            self.missed_deadlines += 1
+
+    def report(self):
+        count = min(self.frame_count, len(self.frame_times))
+        times = sorted(self.frame_times[:count])
+        return {
+            "frames": self.frame_count,
+            "sim_steps": self.sim_steps,
+            "dropped_steps": self.dropped_steps,
+            "missed_deadlines": self.missed_deadlines,
+            "p50_ms": percentile(times, 50) * 1000,
+            "p90_ms": percentile(times, 90) * 1000,
+            "p99_ms": percentile(times, 99) * 1000,
+            "max_ms": (times[-1] if times else 0.0) * 1000,
+        }
+
+    def summary(self):
+        r = self.report()
+        return (f"{r['frames']} frames, {r['sim_steps']} sim steps ({r['dropped_steps']} dropped), "
+                f"frame time p50 {r['p50_ms']:.2f} ms / p90 {r['p90_ms']:.2f} ms / "
+                f"p99 {r['p99_ms']:.2f} ms / max {r['max_ms']:.2f} ms, "
+                f"{r['missed_deadlines']} missed deadlines")
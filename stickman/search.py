@@ -0,0 +1,140 @@
+import math
+import multiprocessing
+import random
+import threading
+import time
+
+from stickman import sim
+
+# Lookahead CPU opponent. Each decision picks one of ACTIONS to hold for the
+# next HOLD_FRAMES frames. Candidates are tried UCB1-style (flat Monte Carlo
+# tree search): load the current match state into a scratch match, play the
+# candidate, then random play from both sides, and score the result by damage
+# dealt minus damage taken. It stops at the time budget and picks the most
+# tried candidate.
+
+ACTIONS = (0, sim.LEFT, sim.RIGHT, sim.PUNCH, sim.KICK)
+HOLD_FRAMES = 6
+EXPLORATION = 0.5
+
+# Difficulty: (time budget per decision in ms, frames looked ahead)
+DIFFICULTY = {
+    "easy": (2, 12),
+    "normal": (5, 24),
+    "hard": (12, 36),
+}
+
+class Search:
+    def __init__(self, player, budget_ms=5, depth=24, seed=None):
+        self.player = player  # 0 or 1, the side this search plays
+        self.budget = budget_ms / 1000
+        self.depth = depth
+        self.rng = random.Random(seed)
+        # Both sides input-driven, so rollouts can pick the opponent's buttons too
+        self.match = sim.Match(ai_mode=False, seed=0)
+        self.rollouts = 0
+
+    @classmethod
+    def for_level(cls, player, level="normal", seed=None):
+        budget_ms, depth = DIFFICULTY[level]
+        return cls(player, budget_ms, depth, seed)
+
+    def decide(self, state):
+        # state: sim.Match.save_state() of the real match
+        deadline = time.perf_counter() + self.budget
+        totals = [0.0] * len(ACTIONS)
+        visits = [0] * len(ACTIONS)
+        tried = 0
+        while time.perf_counter() < deadline:
+            if tried < len(ACTIONS):
+                choice = tried
+            else:
+                scale = EXPLORATION * math.sqrt(math.log(tried))
+                choice = max(range(len(ACTIONS)),
+                             key=lambda i: totals[i] / visits[i] + scale / math.sqrt(visits[i]))
+            self.match.load_state(state)
+            totals[choice] += self.rollout(ACTIONS[choice])
+            visits[choice] += 1
+            tried += 1
+        self.rollouts += tried
+        return ACTIONS[max(range(len(ACTIONS)), key=visits.__getitem__)]
+
+    def rollout(self, action):
+        match, rng = self.match, self.rng
+        me = match.players[self.player]
+        them = match.players[1 - self.player]
+        start = me.health - them.health
+        other = 0
+        for frame in range(self.depth):
+            if frame % HOLD_FRAMES == 0:
+                other = rng.choice(ACTIONS)
+                if frame:
+                    action = rng.choice(ACTIONS)
+            if self.player == 0:
+                match.step(action, other)
+            else:
+                match.step(other, action)
+        # Damage traded, then a nudge towards closing the distance so it
+        # still moves in when no hit is possible within the lookahead
+        score = (me.health - them.health - start) / 25
+        return score - abs(me.x - them.x) / sim.WIDTH
+
+def serve(conn, wake, stop, lock, shared, player, level, seed, deterministic):
+    search = Search.for_level(player, level, seed)
+    # The game packs its state into shared; unpack it here to decide from
+    reader = sim.Match(ai_mode=False, seed=0, deterministic=deterministic)
+    while True:
+        wake.acquire()
+        if stop.is_set():
+            break
+        with lock:
+            reader.unpack_from(shared)
+        conn.send(search.decide(reader.save_state()))
+
+class SearchWorker:
+    # Runs a Search away from the game loop: poll() is called once per sim
+    # frame, never waits, and returns the buttons to press. Once a decision
+    # has been held for HOLD_FRAMES and the worker is idle, the state is
+    # packed into shared memory and the worker woken, so the game thread
+    # never pickles or sends anything and at most one request is in flight.
+    # The CPU reacts a budget's worth of frames late, like a person would.
+    def __init__(self, player, level="normal", seed=None, process=True, deterministic=False):
+        self.conn, child = multiprocessing.Pipe()
+        snapshot = sim.FIXED_SNAPSHOT if deterministic else sim.SNAPSHOT
+        self.shared = multiprocessing.RawArray("B", snapshot.size)
+        self.lock = multiprocessing.Lock()
+        # A semaphore, not an Event: Event.set() waits for the woken worker
+        # to pick up its condition, a context switch on the game thread
+        self.wake = multiprocessing.Semaphore(0)
+        self.stop = multiprocessing.Event()
+        worker_cls = multiprocessing.Process if process else threading.Thread
+        self.worker = worker_cls(target=serve, daemon=True,
+                                 args=(child, self.wake, self.stop, self.lock, self.shared,
+                                       player, level, seed, deterministic))
+        self.worker.start()
+        self.buttons = 0
+        self.pending = False
+        self.held = HOLD_FRAMES  # Frames the current buttons have been pressed
+        self.decisions = 0
+
+    def poll(self, match):
+        if self.pending and self.conn.poll():
+            self.buttons = self.conn.recv()
+            self.pending = False
+            self.held = 0
+            self.decisions += 1
+        self.held += 1
+        # If the worker is still copying the last state, try again next frame
+        if not self.pending and self.held >= HOLD_FRAMES and self.lock.acquire(False):
+            try:
+                match.pack_into(self.shared)
+            finally:
+                self.lock.release()
+            self.wake.release()
+            self.pending = True
+        return self.buttons
+
+    def close(self):
+        self.stop.set()
+        self.wake.release()
+        self.worker.join(timeout=1)
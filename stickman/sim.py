@@ -0,0 +1,403 @@
+import functools
+import random
+import struct
+import zlib
+from collections import namedtuple
+
+import pygame
+
+from stickman.moves import (FIXED_ONE, FIXED_SHIFT, ease_in_out_cubic, hit_pull,
+                            hit_pull_fixed, load_moves)
+from stickman.profiler import NULL_PROFILER
+
+# Simulation core: no display, no clock, one call to Match.step() is one frame.
+# pygame is only used for Rect here, which works without pygame.init().
+WIDTH, HEIGHT = 800, 600
+FPS = 60
+
+# Input bits, one per entry in Player.controls
+LEFT = 1
+RIGHT = 2
+PUNCH = 4
+KICK = 8
+
+BUTTONS = {"left": LEFT, "right": RIGHT, "punch": PUNCH, "kick": KICK}
+
+# Player states as small ints, with per-state tables instead of string tests.
+# Idle is 0, each move from moves.json gets the next code, hit comes last.
+MOVES, HITSTUN_FRAMES = load_moves()
+IDLE = 0
+HIT = len(MOVES) + 1
+STATE_NAMES = ("idle",) + tuple(move.name for move in MOVES) + ("hit",)
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+PUNCHING = STATE_CODES["punching"]
+KICKING = STATE_CODES["kicking"]
+MOVE_BUTTONS = tuple((code, BUTTONS[move.button]) for code, move in enumerate(MOVES, 1))
+
+BUSY = (False,) + (True,) * len(MOVES) + (True,)  # Can't move or start an attack
+ATTACKING = (False,) + (True,) * len(MOVES) + (False,)
+ATTACK_DAMAGE = (0,) + tuple(move.damage for move in MOVES) + (0,)
+KNOCKBACK = (0,) + tuple(move.knockback for move in MOVES) + (0,)
+# Frames each state lasts, and the per-frame hitboxes and limb poses, by state code
+STATE_FRAMES = (1,) + tuple(move.frames for move in MOVES) + (HITSTUN_FRAMES,)
+HITBOXES = ((None,),) + tuple(tuple(move.hitboxes) for move in MOVES) + ((None,) * HITSTUN_FRAMES,)
+POSES = ((),) + tuple(tuple(move.poses) for move in MOVES) + ((),)
+LIMBS = (None,) + tuple(move.limb for move in MOVES) + (None,)
+HIT_PULL = hit_pull(HITSTUN_FRAMES)
+# Integer versions for the deterministic sim: whole-pixel hitboxes and the
+# hit pull in fixed point
+FIXED_HITBOXES = (((None,),) + tuple(tuple(move.fixed_hitboxes) for move in MOVES)
+                  + ((None,) * HITSTUN_FRAMES,))
+FIXED_HIT_PULL = hit_pull_fixed(HITSTUN_FRAMES)
+FIXED_HALF = FIXED_ONE >> 1
+
+HIT_COOLDOWN = 20
+
+# contact: (x, y) centre of where the hitbox met the defender's body
+HitEvent = namedtuple("HitEvent", ["frame", "attacker", "defender", "move", "damage", "contact"])
+
+# Built-in AI tuning: frames between decisions, the distances it closes from
+# and backs off inside, and what it picks from (repeat an entry to weight it)
+AIParams = namedtuple("AIParams", ["min_wait", "max_wait", "approach", "retreat", "actions"])
+DEFAULT_AI = AIParams(30, 60, 100, 50, ("move", "punch", "kick"))
+
+# Match state packed for checksums and rewind: frame, AI RNG state, then per
+# player x, prev_x, facing, state, animation_frame, health, hit_cooldown,
+# target_x, ai_action_timer, ai_action_duration. The deterministic sim packs
+# positions as ints, so a float creeping in is an error rather than a desync.
+SNAPSHOT = struct.Struct("<IQ" + "ddbBHiidii" * 2)
+FIXED_SNAPSHOT = struct.Struct("<IQ" + "qqbBHiiqii" * 2)
+
+MASK64 = (1 << 64) - 1
+
+class AIRandom:
+    # splitmix64: the whole generator state is one int, so match snapshots
+    # don't have to copy random.Random's 625-word state
+    __slots__ = ("state",)
+
+    def __init__(self, seed=0):
+        self.state = seed & MASK64
+
+    def next(self):
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+
+    def randint(self, a, b):
+        return a + self.next() % (b - a + 1)
+
+    def choice(self, seq):
+        return seq[self.next() % len(seq)]
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+
+def fixed_mul(value, fraction):
+    # value * fraction (fixed point) rounded to the nearest int, halves away
+    # from zero so both facings round the same way
+    product = value * fraction
+    if product < 0:
+        return -((FIXED_HALF - product) >> FIXED_SHIFT)
+    return (product + FIXED_HALF) >> FIXED_SHIFT
+
+def buttons_from_keys(keys, controls):
+    buttons = 0
+    if keys[controls["left"]]:
+        buttons |= LEFT
+    if keys[controls["right"]]:
+        buttons |= RIGHT
+    if keys[controls["punch"]]:
+        buttons |= PUNCH
+    if keys[controls["kick"]]:
+        buttons |= KICK
+    return buttons
+
+# Player class (game rules only, drawing lives in the game script)
+class Player:
+    __slots__ = ("x", "prev_x", "y", "color", "controls", "is_ai", "ai", "rng", "state",
+                 "animation_frame", "health", "facing", "hit_cooldown", "target_x",
+                 "ai_action_timer", "ai_action_duration")
+    width = 20
+    height = 40
+    head_radius = 10
+    hitboxes = HITBOXES
+
+    def __init__(self, x, y, color, controls, is_ai=False, rng=random, ai=DEFAULT_AI):
+        self.x = x
+        self.prev_x = x  # Position at the start of the last step, for render interpolation
+        self.y = y
+        self.color = color
+        self.controls = controls
+        self.is_ai = is_ai
+        self.ai = ai
+        self.rng = rng
+        self.state = IDLE
+        self.animation_frame = 0
+        self.health = 100
+        self.facing = 1 if x < WIDTH // 2 else -1
+        self.hit_cooldown = 0
+        self.target_x = x
+        self.ai_action_timer = 0
+        self.ai_action_duration = rng.randint(ai.min_wait, ai.max_wait)
+
+    def move(self, keys):
+        self.move_buttons(buttons_from_keys(keys, self.controls))
+
+    def move_buttons(self, buttons):
+        if self.is_ai:
+            return
+        if BUSY[self.state]:
+            return
+        if buttons & LEFT:
+            self.x -= 5
+            self.target_x = self.x
+            self.facing = -1
+        if buttons & RIGHT:
+            self.x += 5
+            self.target_x = self.x
+            self.facing = 1
+        self.x = max(self.head_radius, min(WIDTH - self.head_radius, self.x))
+        self.target_x = self.x
+
+    def handle_input(self, buttons):
+        self.move_buttons(buttons)
+        for code, button in MOVE_BUTTONS:
+            if buttons & button:
+                self.start_move(code)
+
+    def ai_move(self, opponent):
+        # Returns the action when it picks a new one, else None
+        if BUSY[self.state]:
+            return None
+        self.ai_action_timer += 1
+        if self.ai_action_timer >= self.ai_action_duration:
+            self.ai_action_timer = 0
+            ai = self.ai
+            self.ai_action_duration = self.rng.randint(ai.min_wait, ai.max_wait)
+            action = self.rng.choice(ai.actions)
+            if action == "move":
+                distance = opponent.x - self.x
+                if abs(distance) > ai.approach:
+                    self.x += 5 if distance > 0 else -5
+                    self.facing = 1 if distance > 0 else -1
+                elif abs(distance) < ai.retreat:
+                    self.x -= 5 if distance > 0 else -5
+                self.x = max(self.head_radius, min(WIDTH - self.head_radius, self.x))
+                self.target_x = self.x
+            elif action == "punch":
+                self.punch()
+            elif action == "kick":
+                self.kick()
+            return action
+        return None
+
+    @property
+    def state_name(self):
+        return STATE_NAMES[self.state]
+
+    def start_move(self, code):
+        if self.state == IDLE:
+            self.state = code
+            self.animation_frame = 0
+
+    def punch(self):
+        self.start_move(PUNCHING)
+
+    def kick(self):
+        self.start_move(KICKING)
+
+    def update(self):
+        state = self.state
+        if state != IDLE:
+            # animation_frame counts sim frames spent in the state
+            self.animation_frame += 1
+            if state == HIT:
+                self.pull_to_target()
+            if self.animation_frame >= STATE_FRAMES[state]:
+                self.state = IDLE
+                self.animation_frame = 0
+        if self.hit_cooldown > 0:
+            self.hit_cooldown -= 1
+
+    def pull_to_target(self):
+        # Knockback: ease towards target_x over the hitstun
+        self.x = self.x + (self.target_x - self.x) * HIT_PULL[self.animation_frame]
+
+    def get_hitbox(self):
+        if not ATTACKING[self.state]:
+            return None
+        box = self.hitboxes[self.state][self.animation_frame]
+        if box is None:
+            return None
+        x, y, width, height = box
+        return pygame.Rect(self.x + self.facing * x, self.y + y, width, height)
+
+    def save_state(self):
+        return (self.x, self.prev_x, self.facing, self.state, self.animation_frame, self.health,
+                self.hit_cooldown, self.target_x, self.ai_action_timer, self.ai_action_duration)
+
+    def load_state(self, state):
+        (self.x, self.prev_x, self.facing, self.state, self.animation_frame, self.health,
+         self.hit_cooldown, self.target_x, self.ai_action_timer, self.ai_action_duration) = state
+
+    def get_body_hitbox(self):
+        return pygame.Rect(self.x - self.width // 2, self.y - self.head_radius,
+                         self.width, self.height + self.head_radius)
+
+# Deterministic sim: positions stay whole pixels and all the maths is on
+# ints, with tables built from exact fractions, so the same inputs give the
+# same match bit for bit on any machine and Python build. Plays like the
+# float sim but not identically (hitboxes and knockback round to the pixel).
+class Deterministic:
+    __slots__ = ()
+    hitboxes = FIXED_HITBOXES
+
+    def pull_to_target(self):
+        self.x += fixed_mul(self.target_x - self.x, FIXED_HIT_PULL[self.animation_frame])
+
+@functools.lru_cache(maxsize=None)
+def deterministic_player(player_cls=Player):
+    # player_cls with the deterministic maths; one class per player_cls
+    if issubclass(player_cls, Deterministic):
+        return player_cls
+    return type("Deterministic" + player_cls.__name__, (Deterministic, player_cls),
+                {"__slots__": (), "__module__": player_cls.__module__})
+
+def resolve_hit(attacker, defender):
+    hitbox = attacker.get_hitbox()
+    if not hitbox:
+        return None
+    body = defender.get_body_hitbox()
+    if body.colliderect(hitbox):
+        if defender.hit_cooldown == 0 and defender.state != HIT:
+            damage = ATTACK_DAMAGE[attacker.state]
+            defender.state = HIT
+            defender.animation_frame = 0
+            defender.health -= damage
+            defender.hit_cooldown = HIT_COOLDOWN
+            defender.target_x = defender.x - KNOCKBACK[attacker.state] * defender.facing
+            return STATE_NAMES[attacker.state], damage, hitbox.clip(body).center
+    return None
+
+def default_players(ai_mode=True, rng=random, player_cls=Player):
+    player1 = player_cls(200, HEIGHT - 60, (255, 0, 0), {
+        "left": pygame.K_a,
+        "right": pygame.K_d,
+        "punch": pygame.K_w,
+        "kick": pygame.K_s
+    }, is_ai=False, rng=rng)
+    player2 = player_cls(600, HEIGHT - 60, (0, 0, 255), {
+        "left": pygame.K_LEFT,
+        "right": pygame.K_RIGHT,
+        "punch": pygame.K_UP,
+        "kick": pygame.K_DOWN
+    }, is_ai=ai_mode, rng=rng)
+    return player1, player2
+
+# One fight between two players, stepped one fixed frame at a time
+class Match:
+    def __init__(self, player1=None, player2=None, ai_mode=True, seed=None, player_cls=Player,
+                 deterministic=False):
+        # Always have a concrete seed so the match can be replayed
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        # With deterministic=True players given here have to be Deterministic too
+        self.deterministic = deterministic
+        self.snapshot = FIXED_SNAPSHOT if deterministic else SNAPSHOT
+        self.packed = bytearray(self.snapshot.size)
+        if player1 is None or player2 is None:
+            if deterministic:
+                player_cls = deterministic_player(player_cls)
+            player1, player2 = default_players(ai_mode, AIRandom(seed), player_cls)
+        # The AI's RNG starts fresh at the seed when the first frame is stepped
+        self.rng = AIRandom(seed)
+        player1.rng = player2.rng = self.rng
+        self.player1 = player1
+        self.player2 = player2
+        self.frame = 0
+        self.profiler = NULL_PROFILER
+        self.telemetry = None  # stickman.telemetry.Telemetry, or None
+
+    @property
+    def players(self):
+        return self.player1, self.player2
+
+    def step(self, inputs_p1=0, inputs_p2=0):
+        player1, player2 = self.player1, self.player2
+        player1.prev_x = player1.x
+        player2.prev_x = player2.x
+        ai1 = ai2 = None
+        if player1.is_ai:
+            ai1 = player1.ai_move(player2)
+        else:
+            player1.handle_input(inputs_p1)
+        if player2.is_ai:
+            ai2 = player2.ai_move(player1)
+        else:
+            player2.handle_input(inputs_p2)
+        self.profiler.lap("input")
+
+        # Check for hits
+        events = []
+        hit = resolve_hit(player1, player2)
+        if hit:
+            events.append(HitEvent(self.frame, 0, 1, *hit))
+        hit = resolve_hit(player2, player1)
+        if hit:
+            events.append(HitEvent(self.frame, 1, 0, *hit))
+        self.profiler.lap("collision")
+
+        player1.update()
+        player2.update()
+        self.profiler.lap("update")
+        if self.telemetry is not None:
+            self.telemetry.record(self.frame, events, ai1, ai2, player1.state, player2.state)
+        self.frame += 1
+        return events
+
+    def save_state(self):
+        # Everything step() reads or writes
+        return self.frame, self.player1.save_state(), self.player2.save_state(), self.rng.getstate()
+
+    def load_state(self, state):
+        self.frame, player1, player2, rng_state = state
+        self.player1.load_state(player1)
+        self.player2.load_state(player2)
+        self.rng.setstate(rng_state)
+
+    def pack_into(self, buffer, offset=0):
+        # save_state() as bytes, written in place
+        p1, p2 = self.player1, self.player2
+        self.snapshot.pack_into(
+            buffer, offset, self.frame, self.rng.state,
+            p1.x, p1.prev_x, p1.facing, p1.state, p1.animation_frame, p1.health,
+            p1.hit_cooldown, p1.target_x, p1.ai_action_timer, p1.ai_action_duration,
+            p2.x, p2.prev_x, p2.facing, p2.state, p2.animation_frame, p2.health,
+            p2.hit_cooldown, p2.target_x, p2.ai_action_timer, p2.ai_action_duration)
+
+    def unpack_from(self, buffer, offset=0):
+        values = self.snapshot.unpack_from(buffer, offset)
+        self.frame, self.rng.state = values[:2]
+        self.player1.load_state(values[2:12])
+        self.player2.load_state(values[12:])
+
+    def checksum(self):
+        # CRC32 of the packed state: a couple of microseconds, cheap enough to
+        # take every frame and compare across machines
+        self.pack_into(self.packed)
+        return zlib.crc32(self.packed)
+
+    def run(self, frames, inputs=None):
+        # inputs: optional callable (match) -> (inputs_p1, inputs_p2)
+        events = []
+        for _ in range(frames):
+            if inputs is None:
+                events.extend(self.step())
+            else:
+                events.extend(self.step(*inputs(self)))
+        return events
@@ -0,0 +1,261 @@
+import argparse
+import json
+import queue
+import struct
+import sys
+import threading
+import zlib
+from array import array
+
+from stickman import sim
+
+# Match telemetry: hits landed, damage by move, time in each player state
+# and the AI's action mix. Match.step() hands each frame to record(), which
+# only writes a few ints into preallocated columns. Full blocks go to a
+# background thread that compresses and writes them, so no file I/O or
+# encoding runs in the frame loop. With no free block (the writer fell
+# behind) events are dropped and counted instead of blocking.
+#
+#   header: b"STKT", version, names JSON size, names JSON (states, actions)
+#   chunk:  event count, compressed size, compressed columns
+# Columns, little-endian: kind B, frame I, player B, code B, value h. code
+# is a state code for HIT and STATE, an action index for AI, the winner for
+# END (2: nobody). value is the damage of a HIT.
+#
+# python -m stickman.telemetry FILE... prints a report per match.
+
+MAGIC = b"STKT"
+VERSION = 1
+HEADER = struct.Struct("<4sBI")
+CHUNK = struct.Struct("<II")
+
+START, END, HIT, STATE, AI = range(5)
+ACTIONS = ("move", "punch", "kick")
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+COLUMNS = (("kind", "B"), ("frame", "I"), ("player", "B"), ("code", "B"), ("value", "h"))
+BLOCK_EVENTS = 4096
+
+class TelemetryError(Exception):
+    pass
+
+def column_bytes(column, count):
+    data = array(column.typecode, memoryview(column)[:count])
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+class Block:
+    # One set of preallocated columns: filled by the game, emptied by the writer
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.columns = [array(typecode, [0]) * size for _, typecode in COLUMNS]
+
+class Telemetry:
+    # Set as Match.telemetry between start_match() and end_match()
+    def __init__(self, path, block_events=BLOCK_EVENTS, blocks=4):
+        self.file = open(path, "wb")
+        self.free = queue.SimpleQueue()
+        for _ in range(blocks):
+            self.free.put(Block(block_events))
+        self.full = queue.SimpleQueue()
+        self.block = self.free.get()
+        self.states = [sim.IDLE, sim.IDLE]
+        self.events = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.write_blocks, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def add(self, kind, frame, player, code=0, value=0):
+        block = self.block
+        if block is None:
+            block = self.block = self.next_block()
+            if block is None:
+                self.dropped += 1
+                return
+        i = block.count
+        kinds, frames, players, codes, values = block.columns
+        kinds[i] = kind
+        frames[i] = frame
+        players[i] = player
+        codes[i] = code
+        values[i] = value
+        block.count = i + 1
+        self.events += 1
+        if block.count == block.size:
+            self.hand_off()
+
+    def next_block(self):
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            return None
+
+    def hand_off(self):
+        # Queue the current block for writing and carry on in a free one
+        if self.block is not None and self.block.count:
+            self.full.put(self.block)
+            self.block = self.next_block()
+
+    def start_match(self, match):
+        self.add(START, match.frame, 0)
+        for index, player in enumerate(match.players):
+            self.states[index] = player.state
+            self.add(STATE, match.frame, index, player.state)
+
+    def record(self, frame, events, ai1, ai2, state1, state2):
+        # One Match.step(): frame is the one just stepped
+        if ai1 is not None:
+            self.add(AI, frame, 0, ACTION_CODES[ai1])
+        if ai2 is not None:
+            self.add(AI, frame, 1, ACTION_CODES[ai2])
+        for event in events:
+            self.add(HIT, frame, event.attacker, sim.STATE_CODES[event.move], event.damage)
+        # New states hold from the next frame on
+        states = self.states
+        if state1 != states[0]:
+            states[0] = state1
+            self.add(STATE, frame + 1, 0, state1)
+        if state2 != states[1]:
+            states[1] = state2
+            self.add(STATE, frame + 1, 1, state2)
+
+    def end_match(self, match):
+        health1, health2 = match.player1.health, match.player2.health
+        winner = 0 if health1 > health2 else 1 if health2 > health1 else 2
+        self.add(END, match.frame, 0, winner)
+        self.hand_off()
+
+    def write_blocks(self):
+        names = json.dumps({"states": sim.STATE_NAMES, "actions": ACTIONS}).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(names)) + names)
+        while True:
+            block = self.full.get()
+            if block is None:
+                break
+            data = zlib.compress(b"".join(column_bytes(column, block.count)
+                                          for column in block.columns))
+            self.file.write(CHUNK.pack(block.count, len(data)) + data)
+            block.count = 0
+            self.free.put(block)
+        self.file.close()
+
+    def close(self):
+        if not self.thread.is_alive():
+            return
+        self.hand_off()
+        self.full.put(None)
+        self.thread.join()
+
+def read_events(path):
+    # Returns (state names, action names, [(kind, frame, player, code, value)])
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise TelemetryError(f"{path} is truncated")
+        magic, version, size = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise TelemetryError(f"{path} is not a telemetry file")
+        if version != VERSION:
+            raise TelemetryError(f"unsupported telemetry version {version}")
+        names = json.loads(f.read(size))
+        events = []
+        while True:
+            header = f.read(CHUNK.size)
+            if not header:
+                break
+            if len(header) != CHUNK.size:
+                raise TelemetryError(f"{path} is truncated")
+            count, size = CHUNK.unpack(header)
+            data = zlib.decompress(f.read(size))
+            columns = []
+            for _, typecode in COLUMNS:
+                column = array(typecode)
+                end = count * column.itemsize
+                column.frombytes(data[:end])
+                if sys.byteorder != "little":
+                    column.byteswap()
+                columns.append(column)
+                data = data[end:]
+            events.extend(zip(*columns))
+    return names["states"], names["actions"], events
+
+def summarize(path):
+    # One dict per match, in file order
+    states, actions, events = read_events(path)
+    matches = []
+    match = None
+    for kind, frame, player, code, value in events:
+        if kind == START:
+            match = {"start": frame, "frames": 0, "winner": None,
+                     "hits": [0, 0], "damage": [{}, {}], "ai_actions": [{}, {}],
+                     "state_frames": [{}, {}], "current": [None, None]}
+            matches.append(match)
+        elif match is None:
+            continue
+        elif kind == HIT:
+            match["hits"][player] += 1
+            damage = match["damage"][player]
+            damage[states[code]] = damage.get(states[code], 0) + value
+        elif kind == AI:
+            mix = match["ai_actions"][player]
+            mix[actions[code]] = mix.get(actions[code], 0) + 1
+        elif kind in (STATE, END):
+            # Close the running state of one player (STATE) or both (END)
+            for index in ((player,) if kind == STATE else (0, 1)):
+                current = match["current"][index]
+                if current is not None:
+                    name, since = current
+                    held = match["state_frames"][index]
+                    held[name] = held.get(name, 0) + frame - since
+                match["current"][index] = (states[code], frame) if kind == STATE else None
+            if kind == END:
+                match["frames"] = frame - match["start"]
+                match["winner"] = None if code == 2 else code
+                match = None
+    for match in matches:
+        del match["current"]
+    return matches
+
+def format_match(number, match):
+    winner = "none" if match["winner"] is None else f"P{match['winner'] + 1}"
+    frames = match["frames"] or 1
+    lines = [f"match {number}: {match['frames']} frames ({match['frames'] / sim.FPS:.1f} s), "
+             f"winner {winner}"]
+    for index in range(2):
+        damage = ", ".join(f"{name} {amount}" for name, amount in sorted(match["damage"][index].items()))
+        states = ", ".join(f"{name} {count / frames * 100:.1f}%"
+                           for name, count in sorted(match["state_frames"][index].items()))
+        lines.append(f"  P{index + 1}: {match['hits'][index]} hits landed, "
+                     f"damage by move: {damage or '-'}")
+        lines.append(f"      time in state: {states or '-'}")
+        if match["ai_actions"][index]:
+            mix = match["ai_actions"][index]
+            total = sum(mix.values())
+            lines.append("      AI actions: " + ", ".join(
+                f"{name} {count} ({count / total * 100:.0f}%)" for name, count in sorted(mix.items())))
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report on stickman match telemetry files")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    report = {}
+    for path in args.files:
+        try:
+            report[path] = summarize(path)
+        except (OSError, TelemetryError, zlib.error) as e:
+            print(f"{path}: FAILED, {e}", file=sys.stderr)
+            return 1
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    for path, matches in report.items():
+        print(f"{path}: {len(matches)} match{'' if len(matches) == 1 else 'es'}")
+        for number, match in enumerate(matches, 1):
+            print(format_match(number, match))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
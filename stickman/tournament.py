@@ -0,0 +1,185 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import sys
+import time
+from itertools import combinations
+
+from stickman import sim
+
+# Headless self-play for tuning the built-in AI (sim.AIParams). Games are
+# spread over a process pool, results stream back in order and feed Elo
+# ratings and win rates. Round-robin plays every pair of a pool; evolve
+# keeps the better half each generation and refills with mutated copies.
+#   python -m stickman.tournament --pool 8 --games 20
+#   python -m stickman.tournament --mode evolve --pool 16 --generations 10
+
+ELO_START = 1500
+ELO_K = 16
+MAX_FRAMES = 60 * sim.FPS  # A minute per game, then it goes on health
+# The AI only steps 5 px per decision, so from the usual 400 px apart most
+# games would end before anyone is in reach; start them closer instead
+START_GAP = (40, 200)
+ACTION_NAMES = ("move", "punch", "kick")
+
+def describe(params):
+    counts = "".join(f"{name[0]}{params.actions.count(name)}" for name in ACTION_NAMES)
+    return (f"wait {params.min_wait}-{params.max_wait} approach {params.approach} "
+            f"retreat {params.retreat} {counts}")
+
+def random_params(rng):
+    min_wait = rng.randint(1, 60)
+    approach = rng.randint(20, 300)
+    actions = tuple(name for name in ACTION_NAMES for _ in range(rng.randint(1, 4)))
+    return sim.AIParams(min_wait, min_wait + rng.randint(0, 60), approach,
+                        rng.randint(0, approach), actions)
+
+def mutate(params, rng):
+    min_wait = max(1, params.min_wait + rng.randint(-10, 10))
+    max_wait = max(min_wait, params.max_wait + rng.randint(-10, 10))
+    approach = max(20, params.approach + rng.randint(-30, 30))
+    retreat = min(approach, max(0, params.retreat + rng.randint(-20, 20)))
+    counts = [max(1, min(4, params.actions.count(name) + rng.randint(-1, 1)))
+              for name in ACTION_NAMES]
+    actions = tuple(name for name, count in zip(ACTION_NAMES, counts) for _ in range(count))
+    return sim.AIParams(min_wait, max_wait, approach, retreat, actions)
+
+def play_game(job):
+    # One AI vs AI game, returns player 1's score: 1 win, 0.5 draw, 0 loss
+    seed, params1, params2, max_frames = job
+    match = sim.Match(ai_mode=True, seed=seed)
+    player1, player2 = match.players
+    player1.is_ai = True
+    place = random.Random(seed)
+    player1.x = player1.target_x = place.randint(100, 400)
+    player2.x = player2.target_x = player1.x + place.randint(*START_GAP)
+    for player, params in ((player1, params1), (player2, params2)):
+        player.ai = params
+        player.ai_action_duration = match.rng.randint(params.min_wait, params.max_wait)
+    step = match.step
+    while match.frame < max_frames and player1.health > 0 and player2.health > 0:
+        step()
+    if player1.health == player2.health:
+        return 0.5
+    return 1.0 if player1.health > player2.health else 0.0
+
+class Standings:
+    def __init__(self):
+        self.elo = {}
+        self.results = {}  # params -> [wins, draws, losses]
+
+    def add(self, params):
+        self.elo.setdefault(params, ELO_START)
+        self.results.setdefault(params, [0, 0, 0])
+
+    def record(self, a, b, score):
+        expected = 1 / (1 + 10 ** ((self.elo[b] - self.elo[a]) / 400))
+        self.elo[a] += ELO_K * (score - expected)
+        self.elo[b] -= ELO_K * (score - expected)
+        for params, result in ((a, score), (b, 1 - score)):
+            self.results[params][0 if result == 1 else 1 if result == 0.5 else 2] += 1
+
+    def win_rate(self, params):
+        wins, draws, losses = self.results[params]
+        games = wins + draws + losses
+        return (wins + draws / 2) / games if games else 0.0
+
+    def ranked(self, pool=None):
+        pool = self.elo if pool is None else pool
+        return sorted(pool, key=lambda params: self.elo[params], reverse=True)
+
+    def table(self, pool=None, top=None):
+        lines = [f"{'#':>3} {'elo':>6} {'win%':>6} {'W':>5} {'D':>5} {'L':>5}  params"]
+        for rank, params in enumerate(self.ranked(pool)[:top], 1):
+            wins, draws, losses = self.results[params]
+            lines.append(f"{rank:3} {self.elo[params]:6.0f} {self.win_rate(params) * 100:5.1f}% "
+                         f"{wins:5} {draws:5} {losses:5}  {describe(params)}")
+        return "\n".join(lines)
+
+def schedule(pool, games, seed):
+    # Every pair plays `games` games, swapping sides each game
+    jobs = []
+    pairs = []
+    for a, b in combinations(pool, 2):
+        for game in range(games):
+            first, second = (a, b) if game % 2 == 0 else (b, a)
+            jobs.append((seed + len(jobs), first, second, MAX_FRAMES))
+            pairs.append((first, second))
+    return jobs, pairs
+
+def run_round(workers, pool, games, seed, standings, writer=None, chunksize=4):
+    jobs, pairs = schedule(pool, games, seed)
+    start = time.perf_counter()
+    for done, score in enumerate(workers.imap(play_game, jobs, chunksize), 1):
+        a, b = pairs[done - 1]
+        standings.record(a, b, score)
+        if writer is not None:
+            writer.writerow([jobs[done - 1][0], describe(a), describe(b), score])
+        if done % 50 == 0 or done == len(jobs):
+            rate = done / (time.perf_counter() - start)
+            print(f"\r{done}/{len(jobs)} games, {rate:,.0f} games/s", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return len(jobs)
+
+def refill(pool, parents, size, rng):
+    # Mutated copies of the parents until the pool is full, no duplicates
+    while len(pool) < size:
+        params = mutate(rng.choice(parents), rng)
+        if params not in pool:
+            pool.append(params)
+    return pool
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Self-play tournament for the built-in AI")
+    parser.add_argument("--mode", choices=["roundrobin", "evolve"], default="roundrobin")
+    parser.add_argument("--pool", type=int, default=8,
+                        help="parameter sets in play: the default plus random ones (default 8)")
+    parser.add_argument("--games", type=int, default=10,
+                        help="games per pair per round (default 10)")
+    parser.add_argument("--generations", type=int, default=5,
+                        help="rounds of selection in evolve mode (default 5)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes to play games in (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", metavar="FILE", help="also write every game result to FILE")
+    parser.add_argument("--top", type=int, default=20, help="rows in the summary table")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    # The default AI against random parameter sets spread over the whole range
+    pool = [sim.DEFAULT_AI]
+    while len(pool) < args.pool:
+        pool.append(random_params(rng))
+    standings = Standings()
+    out = open(args.csv, "w", newline="") if args.csv else None
+    writer = csv.writer(out) if out else None
+    if writer is not None:
+        writer.writerow(["seed", "player1", "player2", "player1_score"])
+
+    start = time.perf_counter()
+    played = 0
+    with multiprocessing.Pool(args.workers) as workers:
+        generations = args.generations if args.mode == "evolve" else 1
+        for generation in range(generations):
+            for params in pool:
+                standings.add(params)
+            seed = args.seed * 1_000_003 + played
+            played += run_round(workers, pool, args.games, seed, standings, writer)
+            if args.mode == "evolve":
+                print(f"generation {generation + 1}")
+                print(standings.table(pool, args.top))
+                if generation + 1 < generations:
+                    survivors = standings.ranked(pool)[:max(1, len(pool) // 2)]
+                    pool = refill(list(survivors), survivors, args.pool, rng)
+    elapsed = time.perf_counter() - start
+    if out is not None:
+        out.close()
+    print(standings.table(top=args.top))
+    print(f"{played} games in {elapsed:.1f} s, {played / elapsed:,.0f} games/s "
+          f"on {args.workers} workers")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
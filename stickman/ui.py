@@ -0,0 +1,47 @@
+import functools
+import textwrap
+
+import pygame
+
+# Cached fonts, text and retained panels for menus. Everything here renders
+# once and is reused until its content or size changes.
+
+@functools.lru_cache(maxsize=8)
+def get_font(size, name=None):
+    return pygame.font.Font(name, size)
+
+@functools.lru_cache(maxsize=256)
+def render_text(text, size, color, antialias=True):
+    return get_font(size).render(text, antialias, color)
+
+@functools.lru_cache(maxsize=64)
+def wrap_text(text, width):
+    return tuple(textwrap.wrap(text, width=width))
+
+class Panel:
+    def __init__(self, width, height, build):
+        self.size = (width, height)
+        self.build = build
+        self.surface = None
+        self.scaled = None
+        self.scaled_size = None
+
+    def invalidate(self):
+        self.surface = None
+        self.scaled = None
+        self.scaled_size = None
+
+    def render(self):
+        if self.surface is None:
+            self.surface = pygame.Surface(self.size, pygame.SRCALPHA)
+            self.build(self.surface)
+        return self.surface
+
+    def render_scaled(self, scale):
+        size = (int(self.size[0] * scale), int(self.size[1] * scale))
+        if size == self.size:
+            return self.render()
+        if size != self.scaled_size:
+            self.scaled = pygame.transform.scale(self.render(), size)
+            self.scaled_size = size
+        return self.scaled